@@ -1,5 +1,23 @@
 from django.apps import AppConfig
+from django.core.cache import caches
+from django.db.models.signals import post_migrate
+
+
+def clear_caches(**kwargs):
+    """Сбрасывает общие кеши после миграций.
+
+    Кеш переживает процессы: после миграций данных (и при создании
+    тестовой базы) в нём остались бы записи о прежнем содержимом.
+    """
+    for cache in caches.all():
+        cache.clear()
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks, object_cache  # noqa: F401
+        from .instrumentation import install
+        install()
+        post_migrate.connect(clear_caches, sender=self)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Кеш в памяти процесса не годится для нескольких воркеров.
+
+    Смена поколения лент, кеш страниц и объектов и блокировки
+    пересчёта работают, только если кеш общий для всех процессов.
+    """
+    if settings.CACHES['default']['BACKEND'] != LOCMEM:
+        return []
+    return [Warning(
+        'Кеш по умолчанию — LocMemCache: при нескольких воркерах '
+        'инвалидация не доходит до других процессов и они отдают '
+        'устаревшие страницы.',
+        hint="Выберите CACHE_STORAGE = 'sqlite' или другой общий кеш.",
+        id='core.W001',
+    )]
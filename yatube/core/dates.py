@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_since(value):
+    """Дата или дата со временем в ISO-формате.
+
+    Дата без времени означает её начало, время без зоны — текущую
+    зону проекта. Бросает ValueError, если строку не разобрать.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
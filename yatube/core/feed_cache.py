@@ -0,0 +1,60 @@
+import math
+import time
+
+from django.core.cache import cache
+
+FEED_GENERATION_KEY = 'feed:generation'
+FEED_MODIFIED_KEY = 'feed:modified'
+
+
+def next_stamp(previous=None):
+    """Отметка изменения в целых секундах, строго больше `previous`.
+
+    Last-Modified в HTTP точен до секунды. Округление вверх и сдвиг
+    хотя бы на секунду не дают двум изменениям в одну секунду
+    получить одну отметку, иначе клиент с If-Modified-Since получил
+    бы 304 на уже изменённую страницу.
+    """
+    return max(math.ceil(time.time()), (previous or 0) + 1)
+
+
+def get_feed_generation():
+    """Текущее поколение кеша лент.
+
+    Поколение входит в ключ каждого фрагмента ленты, поэтому смена
+    поколения делает все ранее закешированные фрагменты недостижимыми.
+    Начальное значение берётся от времени, чтобы после вытеснения
+    счётчика из кеша не вернуться к уже использованному номеру.
+    """
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        cache.add(FEED_GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(FEED_GENERATION_KEY)
+    return generation
+
+
+def get_feed_modified():
+    """Время последнего изменения лент, unix timestamp.
+
+    Сдвигается вместе с поколением, то есть при каждом сохранении
+    или удалении поста, группы и комментария. Если значение вытеснено
+    из кеша, считаем, что ленты изменились только что: клиент лишний
+    раз получит страницу, но никогда не получит устаревшую.
+    """
+    modified = cache.get(FEED_MODIFIED_KEY)
+    if modified is None:
+        cache.add(FEED_MODIFIED_KEY, next_stamp(), None)
+        modified = cache.get(FEED_MODIFIED_KEY)
+    return modified
+
+
+def bump_feed_generation():
+    """Инвалидирует все фрагменты лент."""
+    cache.set(
+        FEED_MODIFIED_KEY, next_stamp(cache.get(FEED_MODIFIED_KEY)), None
+    )
+    try:
+        return cache.incr(FEED_GENERATION_KEY)
+    except ValueError:
+        get_feed_generation()
+        return cache.incr(FEED_GENERATION_KEY)
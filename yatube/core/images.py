@@ -0,0 +1,117 @@
+"""Обработка загруженных картинок.
+
+Файл декодируется один раз: из него получаются уменьшенный до
+`IMAGE_MAX_SIZE` оригинал без метаданных и варианты для карточек
+лент в WebP и JPEG под каждую ширину из `IMAGE_VARIANT_WIDTHS`.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Формат варианта: расширение файла и MIME-тип.
+VARIANT_FORMATS = {
+    'webp': ('webp', 'image/webp'),
+    'jpeg': ('jpg', 'image/jpeg'),
+}
+
+
+def _open(file_):
+    file_.seek(0)
+    try:
+        image = Image.open(file_)
+    except Image.DecompressionBombError:
+        raise ValidationError('Картинка слишком большая.')
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Картинка {width}x{height} больше допустимых '
+            f'{settings.IMAGE_MAX_PIXELS} пикселей.'
+        )
+    max_size = settings.IMAGE_MAX_SIZE
+    # JPEG декодируется сразу в уменьшенном масштабе.
+    image.draft('RGB', (max_size, max_size))
+    return image
+
+
+def _flatten(image):
+    """RGB-копия; прозрачность заливается белым фоном."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    # Без exif/icc в аргументах Pillow метаданные не записывает.
+    image.save(
+        buffer, fmt.upper(), quality=settings.IMAGE_QUALITY[fmt],
+        optimize=fmt == 'jpeg',
+    )
+    return buffer.getvalue()
+
+
+def card_size(width):
+    """Размер карточки ленты шириной `width` в пропорциях варианта."""
+    card_width, card_height = settings.IMAGE_VARIANT_SIZE
+    return width, round(card_height * width / card_width)
+
+
+def variant_name(name, width, fmt):
+    """Имя файла варианта рядом с оригиналом в подкаталоге variants."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = VARIANT_FORMATS[fmt][0]
+    return os.path.join(directory, 'variants', f'{stem}_{width}.{extension}')
+
+
+class ProcessedImage:
+    """Результат обработки: оригинал и варианты в памяти."""
+
+    def __init__(self, name, original, variants):
+        self.name = name
+        self.original = original
+        # {формат: [(ширина, байты), ...]} по возрастанию ширины.
+        self.variants = variants
+
+    def save_variants(self, original_name, storage):
+        """Записывает варианты в хранилище рядом с `original_name`.
+
+        Возвращает {формат: [(ширина, имя файла), ...]}.
+        """
+        saved = {}
+        for fmt, variants in self.variants.items():
+            saved[fmt] = [
+                (width, storage.save(
+                    variant_name(original_name, width, fmt),
+                    ContentFile(content),
+                ))
+                for width, content in variants
+            ]
+        return saved
+
+
+def process_image(file_):
+    """Проверяет, уменьшает и очищает картинку, готовит варианты.
+
+    Бросает `ValidationError`, если картинка слишком большая.
+    """
+    image = _flatten(_open(file_))
+    max_size = settings.IMAGE_MAX_SIZE
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    variants = {fmt: [] for fmt in VARIANT_FORMATS}
+    for width in sorted(settings.IMAGE_VARIANT_WIDTHS):
+        card = ImageOps.fit(image, card_size(width), Image.LANCZOS)
+        for fmt in VARIANT_FORMATS:
+            variants[fmt].append((width, _encode(card, fmt)))
+    stem = os.path.splitext(os.path.basename(file_.name))[0]
+    return ProcessedImage(
+        f'{stem}.jpg', ContentFile(_encode(image, 'jpeg')), variants
+    )
@@ -0,0 +1,203 @@
+"""Метрики запросов: число SQL-запросов, время SQL и шаблонов, кеш.
+
+Работает без DEBUG: запросы считаются через `execute_wrapper`,
+рендеринг шаблонов и обращения к кешу оборачиваются один раз
+при старте приложения. Гистограммы копятся в памяти процесса,
+поэтому при нескольких воркерах каждый отдаёт свою часть.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_state = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+# Дополнительные разделы ответа метрик: имя -> функция без аргументов.
+_sections = {}
+
+
+class QueryBudgetExceeded(Exception):
+    """Вью выполнила больше SQL-запросов, чем разрешено бюджетом."""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'count': self.total,
+            'sum': round(self.sum, 3),
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+def _new_histograms():
+    return {
+        'queries': Histogram(QUERY_BUCKETS),
+        'sql_ms': Histogram(MS_BUCKETS),
+        'template_ms': Histogram(MS_BUCKETS),
+        'total_ms': Histogram(MS_BUCKETS),
+        'cache_hits': Histogram(QUERY_BUCKETS),
+        'cache_misses': Histogram(QUERY_BUCKETS),
+    }
+
+
+def record(view_name, metrics, total_ms):
+    values = dict(vars(metrics), total_ms=total_ms)
+    with _lock:
+        histograms = _histograms.setdefault(view_name, _new_histograms())
+        for name, histogram in histograms.items():
+            histogram.observe(values[name])
+
+
+def snapshot():
+    """Накопленные гистограммы по именам вью."""
+    with _lock:
+        return {
+            view_name: {
+                name: histogram.as_dict()
+                for name, histogram in histograms.items()
+            }
+            for view_name, histograms in _histograms.items()
+        }
+
+
+def register_section(name, collect):
+    """Добавляет в ответ метрик раздел `name` со значением `collect()`."""
+    _sections[name] = collect
+
+
+def sections():
+    return {name: collect() for name, collect in _sections.items()}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def current():
+    """Метрики текущего запроса или None вне middleware."""
+    return getattr(_state, 'metrics', None)
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        metrics = current()
+        if metrics is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _counted_get(get):
+    missing = object()
+
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, missing, version)
+        metrics = current()
+        if metrics is not None:
+            if value is missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is missing else value
+    wrapper.instrumented = True
+    return wrapper
+
+
+def install():
+    """Оборачивает рендеринг шаблонов и чтение из кешей. Идемпотентна."""
+    if not getattr(Template.render, 'instrumented', False):
+        Template.render = _timed_render(Template.render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if not getattr(backend.get, 'instrumented', False):
+            backend.get = _counted_get(backend.get)
+
+
+class InstrumentationMiddleware:
+    """Собирает метрики каждого запроса по имени разрешённой вью.
+
+    Бюджеты берутся из `QUERY_BUDGETS`. Превышение пишется в лог,
+    а при `QUERY_BUDGETS_ENFORCED` поднимает `QueryBudgetExceeded`,
+    чтобы тесты падали на регрессиях числа запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        previous, _state.metrics = current(), metrics
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(metrics.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _state.metrics = previous
+        total_ms = (time.perf_counter() - started) * 1000
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        record(view_name, metrics, total_ms)
+        self.check_budget(view_name, metrics.queries)
+        return response
+
+    def check_budget(self, view_name, queries):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or queries <= budget:
+            return
+        message = (
+            f'{view_name}: {queries} SQL-запросов при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGETS_ENFORCED:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
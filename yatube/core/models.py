@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class MediaFile(models.Model):
+    """Файл контент-адресуемого хранилища и число ссылок на него.
+
+    Ссылки считают сигналы моделей, которые хранят файлы. Файлы
+    без ссылок удаляет команда `gc_media`.
+    """
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField('Число ссылок', default=0)
+    updated = models.DateTimeField('Дата изменения', db_index=True)
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,158 @@
+"""Read-through кеш объектов, которые вью ищут по id, slug или username.
+
+Объект хранится под ключом модели и первичного ключа, поиск по другому
+полю хранит лишь ссылку на первичный ключ. Поэтому при сохранении или
+удалении объекта достаточно удалить одну запись, а ссылка по старому
+значению поля (например, переименованному slug) отбрасывается проверкой
+при чтении.
+
+Для моделей из `OBJECT_CACHE_FIELDS` в кеш попадают только
+перечисленные поля: остальные у объекта из кеша отложены и читаются
+из базы при обращении. Так в общий кеш не уходят, например, хеши
+паролей и адреса почты пользователей.
+"""
+import copy
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.shortcuts import get_object_or_404
+
+from core import instrumentation
+
+KEY_PREFIX = 'object'
+
+# Попадания и промахи по меткам моделей для этого процесса.
+object_cache_metrics = Counter()
+
+
+def _timeout(model):
+    return settings.OBJECT_CACHE_TIMEOUTS.get(model._meta.label_lower)
+
+
+def _object_key(model, pk):
+    return f'{KEY_PREFIX}:{model._meta.label_lower}:{pk}'
+
+
+def _lookup_key(model, field_name, value):
+    return f'{KEY_PREFIX}:{model._meta.label_lower}:{field_name}={value}'
+
+
+def _is_pk(model, field_name):
+    return field_name in ('pk', model._meta.pk.name)
+
+
+def _detached(obj, keep=()):
+    """Копия объекта без подгруженных связанных объектов.
+
+    Если модель есть в `OBJECT_CACHE_FIELDS`, у копии остаются только
+    эти поля, первичный ключ и поля из `keep`.
+    """
+    clone = copy.copy(obj)
+    clone._state = copy.copy(obj._state)
+    clone._state.fields_cache = {}
+    cached = settings.OBJECT_CACHE_FIELDS.get(obj._meta.label_lower)
+    if cached is not None:
+        kept = set(cached) | set(keep)
+        for field in obj._meta.concrete_fields:
+            if not field.primary_key and field.name not in kept:
+                # Поле, которого нет в __dict__, Django считает отложенным.
+                clone.__dict__.pop(field.attname, None)
+    return clone
+
+
+def _read(model, field_name, value, fields):
+    if _is_pk(model, field_name):
+        pk = value
+    else:
+        pk = cache.get(_lookup_key(model, field_name, value))
+        if pk is None:
+            return None
+    obj = cache.get(_object_key(model, pk))
+    if obj is None or str(getattr(obj, field_name)) != str(value):
+        return None
+    related_keys = {
+        field.name: _object_key(
+            field.related_model, getattr(obj, field.attname)
+        )
+        for field in fields if getattr(obj, field.attname) is not None
+    }
+    found = cache.get_many(related_keys.values())
+    if len(found) < len(related_keys):
+        return None
+    for name, key in related_keys.items():
+        setattr(obj, name, found[key])
+    return obj
+
+
+def _write(obj, field_name, value, fields):
+    model = type(obj)
+    timeout = _timeout(model)
+    keep = () if _is_pk(model, field_name) else (field_name,)
+    cache.set(_object_key(model, obj.pk), _detached(obj, keep), timeout)
+    if not _is_pk(model, field_name):
+        cache.set(_lookup_key(model, field_name, value), obj.pk, timeout)
+    for field in fields:
+        related = getattr(obj, field.name)
+        if related is not None:
+            cache.set(
+                _object_key(field.related_model, related.pk),
+                _detached(related),
+                _timeout(field.related_model),
+            )
+
+
+def cached_get_object_or_404(klass, related=(), **lookup):
+    """`get_object_or_404`, который сначала смотрит в кеш.
+
+    Кешируются модели с таймаутом в `OBJECT_CACHE_TIMEOUTS` при поиске
+    по одному полю. Внешние ключи из `related` при промахе читаются
+    тем же запросом, но кешируются как отдельные объекты, чтобы их
+    изменение не оставляло устаревших копий внутри чужих записей.
+    В остальных случаях функция просто вызывает `get_object_or_404`.
+    """
+    if not isinstance(klass, type):
+        return get_object_or_404(klass, **lookup)
+    fields = [klass._meta.get_field(name) for name in related]
+    models = [klass] + [field.related_model for field in fields]
+    queryset = klass._default_manager.select_related(*related)
+    if len(lookup) != 1 or any(_timeout(model) is None for model in models):
+        return get_object_or_404(queryset, **lookup)
+    (field_name, value), = lookup.items()
+    label = klass._meta.label_lower
+    obj = _read(klass, field_name, value, fields)
+    if obj is not None:
+        object_cache_metrics[label, 'hits'] += 1
+        return obj
+    object_cache_metrics[label, 'misses'] += 1
+    obj = get_object_or_404(queryset, **lookup)
+    _write(obj, field_name, value, fields)
+    return obj
+
+
+def invalidate(model, pk):
+    """Удаляет объект из кеша; нужно после `QuerySet.update()`."""
+    if pk is not None and _timeout(model) is not None:
+        cache.delete(_object_key(model, pk))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_instance(sender, instance, **kwargs):
+    invalidate(sender, instance.pk)
+
+
+def stats():
+    """Попадания, промахи и доля попаданий по моделям."""
+    result = {}
+    for (label, outcome), count in object_cache_metrics.items():
+        result.setdefault(label, {'hits': 0, 'misses': 0})[outcome] = count
+    for values in result.values():
+        total = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / total, 3)
+    return result
+
+
+instrumentation.register_section('object_cache', stats)
@@ -0,0 +1,158 @@
+"""Кеш целых страниц для анонимных посетителей и условные GET.
+
+Ключ страницы и её ETag строятся из пути с query string и поколения
+лент, поэтому любое изменение поста, группы или комментария сразу
+делает закешированные страницы и выданные ETag недействительными.
+Last-Modified — время последнего такого изменения, округлённое
+вверх до секунды (`next_stamp`).
+
+Страницы, которые зависят и от других данных (например, профиль
+с числом подписчиков), перечислены в `PAGE_CACHE_SCOPES`: в их ключ
+входит ещё и версия области, которую сдвигает `bump_page_scope()`.
+
+Неполные ответы (например, с заглушкой вместо ещё не готовой
+миниатюры) помечаются `mark_incomplete()`: они не кешируются
+и уходят без валидаторов.
+"""
+import hashlib
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (
+    add_never_cache_headers, get_conditional_response, patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+
+from core.feed_cache import (
+    get_feed_generation, get_feed_modified, next_stamp
+)
+
+KEY_PREFIX = 'page'
+
+_complete = ContextVar('page_complete', default=True)
+
+
+def _scope_key(view_name, value):
+    return f'{KEY_PREFIX}:scope:{view_name}:{value}'
+
+
+def bump_page_scope(view_name, value):
+    """Сбрасывает страницы вью `view_name` с аргументом `value`."""
+    key = _scope_key(view_name, value)
+    cache.set(key, next_stamp(cache.get(key)), None)
+
+
+def _scope_version(request, view_kwargs):
+    """Версия области страницы или None, если у вью её нет.
+
+    Вытесненная из кеша версия считается только что сдвинутой.
+    """
+    argument = settings.PAGE_CACHE_SCOPES.get(request.resolver_match.view_name)
+    if argument is None:
+        return None
+    key = _scope_key(request.resolver_match.view_name, view_kwargs[argument])
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, next_stamp(), None)
+        version = cache.get(key)
+    return version
+
+
+def mark_incomplete():
+    """Помечает текущий ответ как неполный."""
+    _complete.set(False)
+
+
+def track_completeness(render):
+    """Результат `render()` и признак того, что он полный.
+
+    Неполнота вложенного рендера переходит и на весь ответ.
+    """
+    token = _complete.set(True)
+    try:
+        value = render()
+        complete = _complete.get()
+    finally:
+        _complete.reset(token)
+    if not complete:
+        mark_incomplete()
+    return value, complete
+
+
+def _cacheable(request):
+    match = request.resolver_match
+    return (
+        request.method in ('GET', 'HEAD')
+        and match is not None
+        and match.view_name in settings.PAGE_CACHE_VIEWS
+        and not request.user.is_authenticated
+    )
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=0)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт анонимам готовые страницы из кеша и 304 по валидаторам.
+
+    Подключается после AuthenticationMiddleware. Не кеширует ответы,
+    которые ставят cookie или содержат CSRF-токен, а в DEBUG не
+    работает вовсе, чтобы в кеш не попала панель debug_toolbar.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response, complete = track_completeness(
+            lambda: self.get_response(request)
+        )
+        key = getattr(request, '_page_cache_key', None)
+        if key is None:
+            return response
+        if not complete:
+            add_never_cache_headers(response)
+            return response
+        storable = (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+        )
+        etag, last_modified = request._page_validators
+        _set_validators(response, etag, last_modified)
+        if storable:
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if settings.DEBUG or not _cacheable(request):
+            return None
+        generation = get_feed_generation()
+        last_modified = get_feed_modified()
+        version = _scope_version(request, view_kwargs)
+        if version is not None:
+            generation = f'{generation}:{version}'
+            last_modified = max(last_modified, version)
+        path = request.get_full_path()
+        digest = hashlib.md5(f'{generation}:{path}'.encode()).hexdigest()
+        etag = quote_etag(digest)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return _set_validators(not_modified, etag, last_modified)
+        key = f'{KEY_PREFIX}:{digest}'
+        response = cache.get(key)
+        if response is not None:
+            return response
+        request._page_cache_key = key
+        request._page_validators = etag, last_modified
+        return None
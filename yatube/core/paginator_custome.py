@@ -1,8 +1,208 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import heapq
+import time
 
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def paginator_for_posts(request, post_list, num_posts):
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию в ленте в непрозрачный токен."""
+    raw = f'{direction}|{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора.
+
+    Для повреждённого или пустого токена возвращает None,
+    чтобы вью показала первую страницу, а не ошибку.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по паре (ordering_field, tie_breaker)
+    от новых к старым.
+
+    Каждая страница читается одним запросом `WHERE ... LIMIT per_page + 1`
+    без COUNT и OFFSET, поэтому её стоимость не зависит от глубины.
+    Общее число страниц неизвестно: `num_pages` описывает только окно
+    вокруг текущей страницы, чего достаточно для `Page.has_next()`
+    и `Page.has_previous()`.
+    """
+
+    def __init__(self, object_list, per_page, ordering_field='pub_date',
+                 tie_breaker='pk'):
+        self.ordering_field = ordering_field
+        self.tie_breaker = tie_breaker
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._number = 1
+        object_list = object_list.order_by(
+            f'-{ordering_field}', f'-{tie_breaker}'
+        )
+        super().__init__(object_list, per_page)
+
+    @property
+    def num_pages(self):
+        return self._number + (self.next_cursor is not None)
+
+    def _position(self, obj):
+        if isinstance(obj, dict):
+            # Строки из .values().
+            return obj[self.ordering_field], obj[self.tie_breaker]
+        return (
+            getattr(obj, self.ordering_field),
+            getattr(obj, self.tie_breaker)
+        )
+
+    def _fetch(self, limit, cursor=None, offset=0):
+        """Читает до `limit` объектов после позиции курсора.
+
+        Для направления PREVIOUS объекты идут от старых к новым.
+        """
+        queryset = self.object_list
+        if cursor is not None:
+            direction, value, pk = cursor
+            field, tie_breaker = self.ordering_field, self.tie_breaker
+            if direction == NEXT:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': value})
+                    | Q(**{field: value, f'{tie_breaker}__lt': pk})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': value})
+                    | Q(**{field: value, f'{tie_breaker}__gt': pk})
+                ).order_by(field, tie_breaker)
+        return list(queryset[offset:offset + limit])
+
+    def first_page(self):
+        items = self._fetch(self.per_page + 1)
+        return self._build_page(
+            items[:self.per_page],
+            has_next=len(items) > self.per_page,
+            has_previous=False,
+        )
+
+    def page_by_cursor(self, token):
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return self.first_page()
+        items = self._fetch(self.per_page + 1, cursor)
+        if cursor[0] == NEXT:
+            return self._build_page(
+                items[:self.per_page],
+                has_next=len(items) > self.per_page,
+                has_previous=True,
+            )
+        if len(items) <= self.per_page:
+            # Дошли до начала ленты: отдаём полноценную первую страницу.
+            return self.first_page()
+        items = items[:self.per_page]
+        items.reverse()
+        return self._build_page(items, has_next=True, has_previous=True)
+
+    def page_by_number(self, number):
+        """Поддержка старых ссылок вида `?page=N` без подсчёта COUNT."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        if number <= 1:
+            return self.first_page()
+        items = self._fetch(
+            self.per_page + 1, offset=(number - 1) * self.per_page
+        )
+        return self._build_page(
+            items[:self.per_page],
+            has_next=len(items) > self.per_page,
+            has_previous=True,
+        )
+
+    def _build_page(self, items, has_next, has_previous):
+        self.next_cursor = self.previous_cursor = None
+        if items and has_next:
+            self.next_cursor = encode_cursor(
+                NEXT, *self._position(items[-1])
+            )
+        if items and has_previous:
+            self.previous_cursor = encode_cursor(
+                PREVIOUS, *self._position(items[0])
+            )
+        self._number = 2 if self.previous_cursor else 1
+        return Page(items, self._number, self)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Keyset-пагинация по слиянию нескольких упорядоченных лент.
+
+    Каждый источник читается своим keyset-запросом не дальше
+    `per_page + 1` строк, затем списки сливаются k-way merge.
+    Одинаковые позиции из разных источников схлопываются.
+    В `merge_stats` остаётся стоимость последнего слияния.
+    """
+
+    def __init__(self, querysets, per_page, ordering_field='pub_date',
+                 tie_breaker='pk'):
+        self.sources = [
+            CursorPaginator(queryset, per_page, ordering_field, tie_breaker)
+            for queryset in querysets
+        ]
+        self.merge_stats = {}
+        super().__init__(querysets[0], per_page, ordering_field, tie_breaker)
+
+    def _fetch(self, limit, cursor=None, offset=0):
+        started = time.perf_counter()
+        rows = [
+            source._fetch(offset + limit, cursor) for source in self.sources
+        ]
+        reverse = cursor is None or cursor[0] == NEXT
+        merged = []
+        last = None
+        for item in heapq.merge(*rows, key=self._position, reverse=reverse):
+            position = self._position(item)
+            if position != last:
+                merged.append(item)
+                last = position
+            if len(merged) == offset + limit:
+                break
+        self.merge_stats = {
+            'sources': len(self.sources),
+            'rows_fetched': sum(len(items) for items in rows),
+            'rows_returned': len(merged[offset:]),
+            'seconds': time.perf_counter() - started,
+        }
+        return merged[offset:]
+
+
+def page_from_request(request, paginator):
+    """Страница по параметрам `?cursor=` или устаревшему `?page=`."""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.page_by_cursor(cursor)
+    return paginator.page_by_number(request.GET.get('page'))
+
+
+def paginator_for_posts(request, post_list, num_posts, **options):
     """Paginator для вывода постов постранино."""
-    paginator = Paginator(post_list, num_posts)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    paginator = CursorPaginator(post_list, num_posts, **options)
+    return page_from_request(request, paginator)
@@ -0,0 +1,77 @@
+"""Пул процессов и учёт скорости для долгих management-команд."""
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def process_pool(workers):
+    """Пул из `workers` процессов или None, если `workers` равно 0."""
+    if workers <= 0:
+        yield None
+        return
+    # Дочерние процессы не должны наследовать открытые соединения.
+    connections.close_all()
+    # fork: дочерние процессы получают уже настроенный Django.
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('fork'),
+    )
+    try:
+        yield executor
+    finally:
+        executor.shutdown()
+
+
+def _call(func, item):
+    """Выполняет задачу в процессе пула и закрывает его соединения."""
+    try:
+        return func(item)
+    finally:
+        connections.close_all()
+
+
+def ordered_map(executor, func, items, workers):
+    """Пары (элемент, `func(элемент)`) в порядке `items`.
+
+    Без пула всё считается в текущем процессе. В пул отправляется
+    не больше двух задач на процесс, чтобы входные данные не копились
+    в памяти быстрее, чем вызывающий код разбирает результаты.
+    """
+    if executor is None:
+        for item in items:
+            yield item, func(item)
+        return
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(_call, func, item)))
+        if len(pending) >= workers * 2:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+class Progress:
+    """Число обработанных записей и скорость с момента создания."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+
+    def add(self, count):
+        self.count += count
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed else 0
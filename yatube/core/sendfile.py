@@ -0,0 +1,172 @@
+"""Отдача медиафайлов в продакшене.
+
+Если перед приложением стоит веб-сервер, файл отдаёт он: ответ
+содержит только заголовок `X-Sendfile` (Apache, lighttpd) или
+`X-Accel-Redirect` (nginx), см. `MEDIA_SENDFILE`. Иначе файл уходит
+через `FileResponse`: WSGI-сервер с `wsgi.file_wrapper` (например,
+gunicorn) пересылает его через `os.sendfile` без копирования в Python.
+
+Сами проверяются условные запросы (ETag, Last-Modified) и один
+диапазон `Range` на ответ; множественные диапазоны не поддерживаются,
+на них отдаётся файл целиком, что допускает RFC 7233.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from http import HTTPStatus
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_immutable
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Файл, из которого читается только диапазон байт.
+
+    `fileno()` остаётся доступен, поэтому `wsgi.file_wrapper` может
+    отправить диапазон через `os.sendfile` с текущей позиции,
+    ограничившись `Content-Length`.
+    """
+
+    def __init__(self, file_, start, length):
+        file_.seek(start)
+        self.file = file_
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _resolve(document_root, path):
+    """Абсолютный путь файла; 404 для выхода за корень и скрытых файлов."""
+    path = posixpath.normpath(path).lstrip('/')
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return path, full_path
+
+
+def _etag(path, stat):
+    if is_immutable(path):
+        # Имя и есть хеш содержимого.
+        return '"%s"' % os.path.splitext(os.path.basename(path))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def _byte_range(request, size, etag, last_modified):
+    """(начало, длина) из заголовка Range или None для всего файла.
+
+    Синтаксически неверный заголовок (в том числе с концом раньше
+    начала) игнорируется. Бросает ValueError, если диапазон
+    начинается за концом файла.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+        parse_http_date_safe(if_range) != int(last_modified)
+    ):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def _set_caching(response, path, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if is_immutable(path):
+        patch_cache_control(
+            response, public=True, immutable=True,
+            max_age=settings.MEDIA_IMMUTABLE_MAX_AGE,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE
+        )
+    return response
+
+
+def serve(request, path, document_root=None):
+    """Отдаёт файл `path` из `document_root` (по умолчанию MEDIA_ROOT)."""
+    path, full_path = _resolve(document_root or settings.MEDIA_ROOT, path)
+    stat = os.stat(full_path)
+    etag, last_modified = _etag(path, stat), stat.st_mtime
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    )
+    if not_modified is not None:
+        return _set_caching(not_modified, path, etag, last_modified)
+    content_type = (
+        mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    )
+    backend = settings.MEDIA_SENDFILE
+    if backend is not None:
+        # Диапазоны и отправку файла берёт на себя веб-сервер.
+        response = HttpResponse(content_type=content_type)
+        if backend == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(
+                settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+            )
+        else:
+            response['X-Sendfile'] = full_path
+        return _set_caching(response, path, etag, last_modified)
+    try:
+        byte_range = _byte_range(request, stat.st_size, etag, last_modified)
+    except ValueError:
+        response = HttpResponse(
+            status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return _set_caching(response, path, etag, last_modified)
+    file_ = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file_, content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            RangeFile(file_, start, length), content_type=content_type,
+            status=HTTPStatus.PARTIAL_CONTENT,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}'
+        )
+    return _set_caching(response, path, etag, last_modified)
@@ -0,0 +1,232 @@
+"""Общий для всех процессов кеш в файле SQLite.
+
+В отличие от LocMemCache его видят все воркеры на одной машине:
+фрагмент ленты считается один раз, а инвалидация через смену
+поколения доходит до всех процессов. Внешних сервисов не нужно.
+
+Каждая операция выполняется в своей транзакции, поэтому записи
+атомарны, а `incr` и `add` безопасны при конкурентном доступе.
+Журнал WAL позволяет читать, не дожидаясь пишущих. При превышении
+MAX_ENTRIES вытесняются просроченные записи, затем давно не читанные.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Время последнего чтения обновляется не чаще раза в столько секунд,
+# чтобы горячие ключи не превращали каждое чтение в запись.
+ACCESS_RESOLUTION = 1
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш-бэкенд Django поверх файла SQLite из LOCATION."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _transaction(self):
+        """Транзакция с блокировкой записи с самого начала."""
+        return _Transaction(self._connection())
+
+    @staticmethod
+    def _live(expires, now):
+        return expires is None or expires > now
+
+    def _encode(self, value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            list(keys),
+        ).fetchall()
+        found = {}
+        stale = []
+        for key, value, expires, accessed in rows:
+            if not self._live(expires, now):
+                continue
+            found[keys[key]] = pickle.loads(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                stale.append(key)
+        if stale:
+            with self._transaction() as cursor:
+                cursor.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?',
+                    [(now, key) for key in stale],
+                )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version), self._encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self._transaction() as cursor:
+            cursor.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                rows,
+            )
+            self._cull(cursor, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            cursor.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    key, self._encode(value),
+                    self.get_backend_timeout(timeout), now,
+                ),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(cursor, now)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as cursor:
+            row = cursor.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or not self._live(row[1], now):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            cursor.execute(
+                'UPDATE cache SET value = ?, accessed = ? WHERE key = ?',
+                (self._encode(value), now, key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                'UPDATE cache SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now),
+            )
+            return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        row = self._connection().execute(
+            'SELECT expires FROM cache WHERE key = ?',
+            (self._key(key, version),),
+        ).fetchone()
+        return row is not None and self._live(row[0], time.time())
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._transaction() as cursor:
+            cursor.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        with self._transaction() as cursor:
+            cursor.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт между запросами, закрывать его незачем.
+        pass
+
+    def _cull(self, cursor, now):
+        if self._max_entries is None:
+            return
+        count = cursor.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        cursor.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count -= cursor.rowcount
+        if count <= self._max_entries:
+            return
+        if not self._cull_frequency:
+            # Как и в остальных бэкендах Django, 0 очищает кеш целиком.
+            cursor.execute('DELETE FROM cache')
+            return
+        cursor.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (max(count // self._cull_frequency, count - self._max_entries),),
+        )
+
+
+class _Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection.cursor()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.connection.execute('COMMIT')
+        else:
+            self.connection.execute('ROLLBACK')
@@ -0,0 +1,89 @@
+"""Защита кешей от лавинного пересчёта (cache stampede).
+
+Запись хранит значение вместе с поколением, логическим сроком годности
+и временем, которое занял расчёт. По записи `get_or_compute` решает:
+
+* свежая запись отдаётся как есть, но незадолго до истечения срока
+  запрос может с растущей вероятностью взяться за пересчёт заранее
+  (XFetch: чем дольше считается значение, тем раньше);
+* пересчитывает только тот, кто взял блокировку ключа (single-flight);
+* остальные, пока идёт пересчёт, получают устаревшее значение
+  (stale-while-revalidate), а если его нет — ждут результата.
+  Ответ с устаревшим значением помечается неполным, чтобы кеш
+  страниц не сохранил его под ключом и ETag нового поколения.
+
+Физически запись живёт в кеше дольше логического срока на
+`CACHE_STALE_TIMEOUT`, чтобы было что отдать во время пересчёта.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+from core.page_cache import mark_incomplete
+
+LOCK_SUFFIX = ':lock'
+POLL_INTERVAL = 0.05
+
+
+def _is_fresh(entry, generation, now, beta):
+    _, entry_generation, expires, delta = entry
+    if entry_generation != generation:
+        return False
+    if expires is None:
+        return True
+    # 1 - random() лежит в (0, 1], логарифм от него конечен.
+    return now - delta * beta * math.log(1 - random.random()) < expires
+
+
+def _store(cache, key, compute, timeout, generation):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    if callable(timeout):
+        timeout = timeout()
+    if timeout is None:
+        expires = physical_timeout = None
+    else:
+        expires = time.time() + timeout
+        physical_timeout = timeout + settings.CACHE_STALE_TIMEOUT
+    cache.set(key, (value, generation, expires, delta), physical_timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout, generation=None, cache=None):
+    """Значение из кеша или результат `compute()` без лавины пересчётов.
+
+    `generation` делает запись устаревшей без смены ключа: пока новое
+    значение считается, другие запросы получают прежнее. `timeout`
+    может быть функцией: её вызывают после `compute()`, так срок
+    годности зависит от результата.
+    """
+    cache = cache or default_cache
+    beta = settings.CACHE_EARLY_RECOMPUTE_BETA
+    lock_timeout = settings.CACHE_LOCK_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, generation, time.time(), beta):
+        return entry[0]
+    lock_key = key + LOCK_SUFFIX
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            return _store(cache, key, compute, timeout, generation)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+    if entry is not None:
+        mark_incomplete()
+        return entry[0]
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == generation:
+            return entry[0]
+    # Держатель блокировки не успел или упал — считаем сами.
+    return _store(cache, key, compute, timeout, generation)
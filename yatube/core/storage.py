@@ -0,0 +1,117 @@
+"""Контент-адресуемое хранилище медиафайлов.
+
+Имя файла — SHA-256 его содержимого: `<каталог>/ab/cd/<хеш>.<ext>`.
+Одинаковые загрузки попадают в один файл, и sorl готовит для него
+один набор миниатюр. Содержимое по имени никогда не меняется, поэтому
+такие файлы можно отдавать с вечным `Cache-Control: immutable`.
+
+Сколько объектов ссылается на файл, хранится в `MediaFile`:
+`retain` и `release` вызываются при сохранении и удалении владельцев,
+а `collect_garbage` удаляет файлы, на которые давно никто не ссылается.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from .models import MediaFile
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def _touch(names, **changes):
+    """Заводит строки учёта и продлевает им срок до сборки мусора.
+
+    `ignore_conflicts` не трогает уже существующие строки, поэтому
+    `updated` им сдвигает отдельный UPDATE вместе с `changes`.
+    """
+    now = timezone.now()
+    MediaFile.objects.bulk_create(
+        [MediaFile(name=name, updated=now) for name in names],
+        ignore_conflicts=True,
+    )
+    MediaFile.objects.filter(name__in=names).update(updated=now, **changes)
+
+
+def retain(names):
+    """Добавляет по ссылке на каждый файл из `names`."""
+    names = set(filter(None, names))
+    if names:
+        _touch(names, ref_count=F('ref_count') + 1)
+
+
+def release(names):
+    """Убирает по ссылке; файлы без ссылок дождутся сборки мусора."""
+    names = set(filter(None, names))
+    if names:
+        MediaFile.objects.filter(name__in=names, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, updated=timezone.now()
+        )
+
+
+def is_immutable(name):
+    """Имя выдано контент-адресуемым хранилищем."""
+    return bool(HASHED_NAME.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, раскладывающее файлы по хешу содержимого.
+
+    Из запрошенного имени берутся только каталог и расширение.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if not self.exists(name):
+            # При гонке двух одинаковых загрузок вторая получит имя
+            # с суффиксом: лишняя копия, но не потеря данных.
+            name = super()._save(name, content)
+        # Свежий файл без ссылок не должна удалить сборка мусора.
+        _touch([name])
+        return name
+
+
+def collect_garbage(storage, grace, referenced=None, dry_run=False):
+    """Удаляет файлы без ссылок, не менявшиеся дольше `grace`.
+
+    `referenced(names)` возвращает те из имён, на которые ссылки всё же
+    есть (например, после загрузки в обход сигналов): такие файлы
+    остаются и снова получают ссылку. Вместе с файлом удаляются его
+    миниатюры. Возвращает список удалённых имён.
+    """
+    cutoff = timezone.now() - grace
+    candidates = set(MediaFile.objects.filter(
+        ref_count=0, updated__lt=cutoff
+    ).values_list('name', flat=True))
+    alive = set(referenced(candidates)) if referenced and candidates else set()
+    garbage = sorted(candidates - alive)
+    if dry_run:
+        return garbage
+    retain(alive)
+    deleted = []
+    for name in garbage:
+        # Строка удаляется, только если файл так и не понадобился.
+        removed, _ = MediaFile.objects.filter(
+            name=name, ref_count=0, updated__lt=cutoff
+        ).delete()
+        if removed:
+            default.kvstore.delete_thumbnails(ImageFile(name, storage))
+            storage.delete(name)
+            deleted.append(name)
+    return deleted
@@ -0,0 +1,74 @@
+from django import template
+from django.conf import settings
+
+from core.images import VARIANT_FORMATS, card_size
+from core.page_cache import mark_incomplete
+from core.thumbnails import (
+    THUMBNAIL_OPTIONS, cached_thumbnail, schedule_thumbnails,
+    thumbnail_geometry
+)
+
+register = template.Library()
+
+
+def _srcset(candidates):
+    return ', '.join(f'{url} {width}w' for width, url in candidates)
+
+
+def _variant_candidates(post):
+    storage = post.image.storage
+    return {
+        fmt: [(width, storage.url(name)) for width, name in variants]
+        for fmt, variants in post.variants.items() if variants
+    }
+
+
+def _thumbnail_candidates(file_):
+    """Готовые миниатюры sorl всех ширин; недостающие ставятся в очередь."""
+    candidates, missing = [], []
+    for width in sorted(settings.IMAGE_VARIANT_WIDTHS):
+        geometry = thumbnail_geometry(width)
+        thumbnail = cached_thumbnail(file_, geometry, **THUMBNAIL_OPTIONS)
+        if thumbnail is None:
+            missing.append((geometry, THUMBNAIL_OPTIONS))
+        else:
+            candidates.append((width, thumbnail.url))
+    if missing:
+        schedule_thumbnails(file_.name, missing)
+        mark_incomplete()
+    return {'jpeg': candidates} if candidates else {}
+
+
+@register.inclusion_tag('core/includes/responsive_image.html')
+def responsive_image(post, lazy=True, layout='feed'):
+    """Картинка поста с srcset по всем ширинам `IMAGE_VARIANT_WIDTHS`.
+
+    Берёт варианты, сохранённые при загрузке, а для старых постов —
+    готовые миниатюры sorl; пока готовы не все, ответ помечается
+    неполным. Браузер сам выбирает ширину по `sizes` из
+    `IMAGE_SIZES[layout]`. Первую картинку на экране стоит выводить
+    с `lazy=False`.
+    """
+    context = {'image': None, 'has_image': bool(post.image)}
+    if not post.image:
+        return context
+    candidates = _variant_candidates(post) or _thumbnail_candidates(
+        post.image
+    )
+    fallback = candidates.pop('jpeg', None)
+    if not fallback:
+        return context
+    width, height = card_size(fallback[-1][0])
+    context['image'] = {
+        'src': fallback[-1][1],
+        'srcset': _srcset(fallback),
+        'sources': [
+            {'type': VARIANT_FORMATS[fmt][1], 'srcset': _srcset(items)}
+            for fmt, items in candidates.items()
+        ],
+        'sizes': settings.IMAGE_SIZES[layout],
+        'width': width,
+        'height': height,
+        'lazy': lazy,
+    }
+    return context
@@ -0,0 +1,91 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import TemplateSyntaxError
+from django.templatetags.cache import CacheNode
+
+from core.page_cache import track_completeness
+from core.stampede import get_or_compute
+
+register = template.Library()
+
+
+class ProtectedCacheNode(CacheNode):
+    """Фрагментный кеш с защитой от лавины пересчётов."""
+
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on,
+                 generation):
+        super().__init__(
+            nodelist, expire_time_var, fragment_name, vary_on, None
+        )
+        self.generation = generation
+
+    def render(self, context):
+        expire_time = self.expire_time_var.resolve(context)
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise TemplateSyntaxError(
+                    f'"protected_cache" tag got a non-integer timeout '
+                    f'value: {expire_time!r}'
+                )
+        try:
+            fragment_cache = caches['template_fragments']
+        except InvalidCacheBackendError:
+            fragment_cache = caches['default']
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        generation = None
+        if self.generation is not None:
+            generation = self.generation.resolve(context)
+        complete = True
+
+        def compute():
+            nonlocal complete
+            value, complete = track_completeness(
+                lambda: self.nodelist.render(context)
+            )
+            return value
+
+        # Неполный фрагмент сразу устаревает, но остаётся в кеше
+        # прежней версией на время пересчёта.
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            compute,
+            lambda: expire_time if complete else 0,
+            generation=generation,
+            cache=fragment_cache,
+        )
+
+
+@register.tag('protected_cache')
+def do_protected_cache(parser, token):
+    """Как `{% cache %}`, но пересчёт фрагмента выполняет один запрос.
+
+    Использование::
+
+        {% protected_cache timeout name [var ...] [generation=var] %}
+            ...
+        {% endprotected_cache %}
+
+    Смена `generation` устаревает фрагмент без смены ключа, поэтому
+    на время пересчёта остальные запросы получают прежнюю версию.
+    """
+    nodelist = parser.parse(('endprotected_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    generation = None
+    if len(tokens) > 3 and tokens[-1].startswith('generation='):
+        generation = parser.compile_filter(tokens[-1][len('generation='):])
+        tokens = tokens[:-1]
+    return ProtectedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        generation,
+    )
@@ -0,0 +1,14 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import LOCMEM, check_shared_cache
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_locmem_is_reported(self):
+        """Кеш в памяти процесса даёт предупреждение core.W001."""
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': LOCMEM}}):
+            self.assertEqual(
+                [warning.id for warning in check_shared_cache(None)],
+                ['core.W001'],
+            )
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+from core.pool import Progress, ordered_map, process_pool
+
+
+class PoolTests(SimpleTestCase):
+    def test_results_follow_input_order(self):
+        """С пулом и без него результаты идут в порядке входа."""
+        items = list(range(10))
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                with process_pool(workers) as executor:
+                    pairs = list(ordered_map(executor, abs, items, workers))
+                self.assertEqual(pairs, [(item, item) for item in items])
+
+    def test_progress_rate(self):
+        progress = Progress()
+        progress.add(3)
+        progress.add(2)
+        self.assertEqual(progress.count, 5)
+        self.assertGreater(progress.rate, 0)
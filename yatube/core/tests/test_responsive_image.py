@@ -0,0 +1,77 @@
+import json
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from posts.models import Post
+
+
+@override_settings(
+    IMAGE_VARIANT_WIDTHS=(480, 960),
+    IMAGE_SIZES={'feed': '100vw', 'detail': '75vw'},
+    MEDIA_URL='/media/',
+)
+class ResponsiveImageTests(SimpleTestCase):
+    template = Template(
+        '{% load feed_thumbnails %}{% responsive_image post lazy=lazy %}'
+    )
+
+    def render(self, post, lazy=True):
+        return self.template.render(Context({'post': post, 'lazy': lazy}))
+
+    def test_variants(self):
+        """Сохранённые варианты выводятся в srcset с ленивой загрузкой."""
+        post = Post(image='posts/a.jpg', image_variants=json.dumps({
+            'webp': [[480, 'posts/variants/a_480.webp'],
+                     [960, 'posts/variants/a_960.webp']],
+            'jpeg': [[480, 'posts/variants/a_480.jpg'],
+                     [960, 'posts/variants/a_960.jpg']],
+        }))
+        html = self.render(post)
+        self.assertIn(
+            '<source type="image/webp" srcset="'
+            '/media/posts/variants/a_480.webp 480w, '
+            '/media/posts/variants/a_960.webp 960w" sizes="100vw">',
+            html,
+        )
+        self.assertIn('src="/media/posts/variants/a_960.jpg"', html)
+        self.assertIn('/media/posts/variants/a_480.jpg 480w', html)
+        self.assertIn('width="960" height="339"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertNotIn('loading="lazy"', self.render(post, lazy=False))
+        detail = Template(
+            '{% load feed_thumbnails %}'
+            "{% responsive_image post layout='detail' %}"
+        ).render(Context({'post': post}))
+        self.assertIn('sizes="75vw"', detail)
+
+    def test_legacy_image(self):
+        """Без вариантов берутся готовые миниатюры, остальные в очередь."""
+        post = Post(image='posts/old.jpg')
+        thumbnail = mock.Mock(url='/media/cache/old_960.jpg')
+
+        def cached(file_, geometry, **options):
+            return thumbnail if geometry == '960x339' else None
+
+        with mock.patch(
+            'core.templatetags.feed_thumbnails.cached_thumbnail', cached
+        ), mock.patch(
+            'core.templatetags.feed_thumbnails.schedule_thumbnails'
+        ) as schedule:
+            html = self.render(post)
+        schedule.assert_called_once_with(
+            'posts/old.jpg', [('480x170', {'crop': 'center', 'upscale': True})]
+        )
+        self.assertIn('srcset="/media/cache/old_960.jpg 960w"', html)
+        self.assertNotIn('<source', html)
+
+    def test_placeholder(self):
+        """Пока миниатюр нет, выводится заглушка."""
+        with mock.patch(
+            'core.templatetags.feed_thumbnails.cached_thumbnail',
+            return_value=None,
+        ), mock.patch('core.templatetags.feed_thumbnails.schedule_thumbnails'):
+            html = self.render(Post(image='posts/new.jpg'))
+        self.assertIn('aspect-ratio', html)
+        self.assertEqual(self.render(Post()).strip(), '')
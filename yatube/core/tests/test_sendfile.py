@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_MAX_AGE=60)
+class MediaServingTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, 'posts'), exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, 'posts', 'a.bin'), 'wb') as file_:
+            file_.write(CONTENT)
+        with open(os.path.join(MEDIA_ROOT, '.state'), 'w') as file_:
+            file_.write('1')
+        cls.url = reverse('media', args=('posts/a.bin',))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с заголовками кеширования."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_ranges(self):
+        """Поддерживаются обычный и суффиксный диапазоны."""
+        cases = (
+            ('bytes=10-19', CONTENT[10:20], 'bytes 10-19/1024'),
+            ('bytes=1000-', CONTENT[1000:], 'bytes 1000-1023/1024'),
+            ('bytes=-4', CONTENT[-4:], 'bytes 1020-1023/1024'),
+            ('bytes=1020-5000', CONTENT[1020:], 'bytes 1020-1023/1024'),
+        )
+        for header, content, content_range in cases:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content), content
+                )
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(content))
+                )
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+        for header in ('bytes=0-1,5-6', 'bytes=5-2'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotIn('Content-Range', response)
+
+    def test_conditional_requests(self):
+        """По ETag отдаётся 304, а устаревший If-Range — весь файл."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_hidden_and_missing_files(self):
+        """Скрытые, отсутствующие и внешние файлы не отдаются."""
+        for path in ('.state', 'posts/missing.bin', '../etc/passwd'):
+            with self.subTest(path=path):
+                response = self.client.get('/media/' + path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_front_end_delegation(self):
+        """При MEDIA_SENDFILE файл отправляет веб-сервер."""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.bin'
+        )
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(MEDIA_ROOT, 'posts', 'a.bin'),
+        )
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.sqlite_cache import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'OPTIONS': options})
+
+
+def increment(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """Бэкенд поддерживает основной API кеша Django."""
+        cache = self.cache
+        cache.set('post', {'text': 'Пост'})
+        self.assertEqual(cache.get('post'), {'text': 'Пост'})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.add('post', 'другое'))
+        self.assertTrue(cache.add('new', 1))
+        self.assertEqual(cache.incr('new', 2), 3)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        self.assertEqual(cache.get_many(['post', 'new', 'missing']), {
+            'post': {'text': 'Пост'}, 'new': 3,
+        })
+        cache.delete('post')
+        self.assertFalse(cache.has_key('post'))
+        cache.clear()
+        self.assertIsNone(cache.get('new'))
+
+    def test_expiration(self):
+        """Просроченные записи не читаются и освобождают место для add."""
+        self.cache.set('short', 1, timeout=0.05)
+        self.cache.set('forever', 1, timeout=None)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.assertEqual(self.cache.get('short'), 2)
+        self.assertTrue(self.cache.touch('forever', 0.05))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('forever'))
+
+    def test_lru_eviction(self):
+        """Сверх MAX_ENTRIES вытесняются давно не читанные ключи."""
+        cache = make_cache(self.path, MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        with cache._transaction() as cursor:
+            cursor.execute('UPDATE cache SET accessed = accessed - 10')
+        # Чтение «a» делает его самым свежим.
+        cache.get('a')
+        cache.set('d', 'd')
+        self.assertEqual(
+            cache.get_many(['a', 'b', 'c', 'd']),
+            {'a': 'a', 'c': 'c', 'd': 'd'},
+        )
+
+    def test_shared_between_processes(self):
+        """Процессы видят один кеш, а incr не теряет обновлений."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
@@ -0,0 +1,103 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.page_cache import track_completeness
+from core.stampede import get_or_compute
+
+THREADS = 8
+
+
+@override_settings(CACHE_LOCK_TIMEOUT=5, CACHE_EARLY_RECOMPUTE_BETA=1.0)
+class StampedeTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self):
+        with self.calls_lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(0.2)
+        return f'значение {calls}'
+
+    def run_concurrently(self, generation=None):
+        results = []
+        barrier = threading.Barrier(THREADS)
+
+        def worker():
+            barrier.wait()
+            results.append(get_or_compute(
+                'fragment', self.compute, 60, generation=generation
+            ))
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_recomputation_per_expiry(self):
+        """На пустом ключе и после устаревания считает один запрос."""
+        results = self.run_concurrently(generation=1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['значение 1'] * THREADS)
+        started = time.monotonic()
+        results = self.run_concurrently(generation=2)
+        elapsed = time.monotonic() - started
+        self.assertEqual(self.calls, 2)
+        # Пока один пересчитывает, остальные сразу получают старую версию.
+        self.assertEqual(results.count('значение 2'), 1)
+        self.assertEqual(results.count('значение 1'), THREADS - 1)
+        self.assertLess(elapsed, 0.2 * 2)
+        self.assertEqual(
+            get_or_compute('fragment', self.compute, 60, generation=2),
+            'значение 2',
+        )
+
+    def test_early_recomputation(self):
+        """Незадолго до истечения запись пересчитывается заранее."""
+        get_or_compute('fragment', self.compute, 60)
+        with mock.patch('core.stampede.random.random', return_value=0.5):
+            get_or_compute('fragment', self.compute, 60)
+            self.assertEqual(self.calls, 1)
+            with mock.patch(
+                'core.stampede.time.time', return_value=time.time() + 59.9
+            ):
+                get_or_compute('fragment', self.compute, 60)
+        self.assertEqual(self.calls, 2)
+
+    def test_template_tag(self):
+        """Тег кеширует фрагмент и пересчитывает его при смене поколения."""
+        template = Template(
+            '{% load protected_cache %}'
+            '{% protected_cache 60 name generation=generation %}'
+            '{{ value }}{% endprotected_cache %}'
+        )
+
+        def render(**context):
+            return template.render(Context(context))
+
+        self.assertEqual(render(value='a', generation=1), 'a')
+        self.assertEqual(render(value='b', generation=1), 'a')
+        self.assertEqual(render(value='b', generation=2), 'b')
+
+    def test_stale_value_marks_response_incomplete(self):
+        """Устаревшее значение делает ответ неполным, свежее — нет."""
+        get_or_compute('fragment', self.compute, 60, generation=1)
+        value, complete = track_completeness(lambda: get_or_compute(
+            'fragment', self.compute, 60, generation=1
+        ))
+        self.assertTrue(complete)
+        cache.add('fragment:lock', 'другой запрос')
+        value, complete = track_completeness(lambda: get_or_compute(
+            'fragment', self.compute, 60, generation=2
+        ))
+        self.assertEqual(value, 'значение 1')
+        self.assertFalse(complete)
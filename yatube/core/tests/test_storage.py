@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import MediaFile
+from core.storage import (
+    ContentAddressedStorage, collect_garbage, is_immutable, release, retain
+)
+from core.views import media
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.directory)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_identical_content_shares_one_file(self):
+        """Одинаковое содержимое получает одно имя по SHA-256."""
+        first = self.storage.save('posts/a.JPG', ContentFile(b'image'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'image'))
+        other = self.storage.save('posts/a.jpg', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(
+            first, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$'
+        )
+        self.assertTrue(is_immutable(first))
+        self.assertFalse(is_immutable('posts/a.jpg'))
+        self.assertEqual(MediaFile.objects.get(name=first).ref_count, 0)
+
+    def test_garbage_collection(self):
+        """Удаляются только давние файлы без ссылок."""
+        kept = self.storage.save('posts/a.jpg', ContentFile(b'kept'))
+        garbage = self.storage.save('posts/b.jpg', ContentFile(b'garbage'))
+        found = self.storage.save('posts/c.jpg', ContentFile(b'found'))
+        retain([kept, garbage])
+        release([garbage])
+        self.assertEqual(
+            collect_garbage(self.storage, timedelta(hours=1)), []
+        )
+        removed = collect_garbage(
+            self.storage, timedelta(0), referenced=lambda names: {found}
+        )
+        self.assertEqual(removed, [garbage])
+        self.assertFalse(self.storage.exists(garbage))
+        self.assertTrue(self.storage.exists(kept))
+        self.assertTrue(self.storage.exists(found))
+        self.assertEqual(MediaFile.objects.get(name=found).ref_count, 1)
+
+    @override_settings(MEDIA_IMMUTABLE_MAX_AGE=100)
+    def test_immutable_cache_headers(self):
+        """Файлы с хешем в имени отдаются с вечным кешем."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'image'))
+        request = RequestFactory().get('/media/')
+        response = media(request, name, document_root=self.directory)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response['Cache-Control'], 'public, immutable, max-age=100'
+        )
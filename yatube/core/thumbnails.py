@@ -0,0 +1,140 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.images import card_size
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+_executor_lock = threading.Lock()
+# Задания, которые уже стоят в пуле: их читают и меняют потоки
+# запросов и потоки пула.
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def _job_key(name, geometry, options):
+    return name, geometry, tuple(sorted(options.items()))
+
+
+def thumbnail_geometry(width):
+    """Геометрия sorl для карточки ленты шириной `width`."""
+    return '{}x{}'.format(*card_size(width))
+
+
+def default_geometries():
+    """Миниатюры всех ширин `IMAGE_VARIANT_WIDTHS`."""
+    return [
+        (thumbnail_geometry(width), THUMBNAIL_OPTIONS)
+        for width in sorted(settings.IMAGE_VARIANT_WIDTHS)
+    ]
+
+
+def cached_thumbnail(file_, geometry, **options):
+    """Готовая миниатюра из хранилища sorl или None.
+
+    Повторяет нормализацию опций из `ThumbnailBackend.get_thumbnail`,
+    чтобы получить то же имя файла, но ничего не генерирует. Публичного
+    способа найти миниатюру без генерации в sorl нет, поэтому здесь
+    используются его внутренние методы, а версия sorl-thumbnail
+    закреплена в requirements.txt; совпадение имён с `get_thumbnail`
+    проверяет тест `warm_thumbnails`.
+    """
+    if not file_:
+        return None
+    backend = default.backend
+    source = ImageFile(file_)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def render_thumbnails(name, geometries=None):
+    """Генерирует миниатюры файла во всех нужных размерах.
+
+    Кеши лент не сбрасываются: фрагменты с заглушками и так не
+    считаются свежими и пересчитываются следующим запросом.
+    """
+    geometries = geometries or default_geometries()
+    # Оригиналы лежат в хранилище загрузок, а не в хранилище sorl:
+    # от этого зависит ключ миниатюры в kvstore.
+    source = ImageFile(name, default_storage)
+    rendered = 0
+    for geometry, options in geometries:
+        try:
+            get_thumbnail(source, geometry, **options)
+            rendered += 1
+        except Exception:
+            logger.exception('Не удалось создать миниатюру %s', name)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(_job_key(name, geometry, options))
+    return rendered
+
+
+def _render_in_worker(name, geometries):
+    try:
+        return render_thumbnails(name, geometries)
+    finally:
+        # Потоки пула живут долго, соединения с базой за собой закрываем.
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def schedule_thumbnails(name, geometries=None):
+    """Ставит генерацию миниатюр в фоновый пул после коммита.
+
+    Одинаковые задания, которые ещё выполняются, не дублируются.
+    При `THUMBNAIL_WORKERS = 0` миниатюры готовятся сразу после коммита
+    в текущем потоке.
+    """
+    if not name:
+        return
+    geometries = geometries or default_geometries()
+
+    def submit():
+        with _in_flight_lock:
+            pending = [
+                (geometry, options) for geometry, options in geometries
+                if _job_key(name, geometry, options) not in _in_flight
+            ]
+            _in_flight.update(
+                _job_key(name, geometry, options)
+                for geometry, options in pending
+            )
+        if not pending:
+            return
+        if settings.THUMBNAIL_WORKERS:
+            _get_executor().submit(_render_in_worker, name, pending)
+        else:
+            render_thumbnails(name, pending)
+
+    transaction.on_commit(submit)
@@ -1,5 +1,12 @@
+import hmac
 from http import HTTPStatus
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_safe
+
+from core import instrumentation, sendfile
 
 
 def page_not_found(request, exception):
@@ -30,3 +37,27 @@ def server_error(request):
 def permission_denied(request, exception):
     template = 'core/403.html'
     return render(request, template, status=HTTPStatus.FORBIDDEN)
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def metrics(request):
+    """Гистограммы метрик запросов для персонала и сборщика метрик.
+
+    Сборщик передаёт `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise Http404
+    data = instrumentation.snapshot()
+    data.update(instrumentation.sections())
+    return JsonResponse(data)
+
+
+@require_safe
+def media(request, path, document_root=None):
+    """Медиафайлы; в продакшене отдачу берёт на себя веб-сервер."""
+    return sendfile.serve(request, path, document_root=document_root)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import matching_ids
 
 
 class BaseAdminSettings(admin.ModelAdmin):
@@ -18,6 +19,12 @@ class PostAdmin(BaseAdminSettings):
     )
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту идёт через инвертированный индекс."""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=matching_ids(search_term)), False
+
 
 class GroupAdmin(BaseAdminSettings):
     """Кастомизация admin панели (управление группами)."""
@@ -0,0 +1,123 @@
+"""JSON API лент только для чтения.
+
+Ответы собираются из строк `.values()` без создания моделей и рендеринга
+шаблонов. Клиент может выбрать поля через `?fields=id,text,author`;
+страницы листаются курсором из поля `next`.
+"""
+from http import HTTPStatus
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+
+from core.object_cache import cached_get_object_or_404
+from core.paginator_custome import paginator_for_posts
+from yatube.settings import NUM_POSTS_PER_PAGE
+from .models import Group, Post, User
+from .timeline import timeline_page
+
+# Имя поля в API и путь к нему для .values().
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _selected_fields(request):
+    """Запрошенные поля; ValueError со списком неизвестных."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(API_FIELDS)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(API_FIELDS))
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return fields
+
+
+def _columns(fields):
+    # pk и pub_date нужны курсору, даже если клиент их не просил.
+    columns = ['pk', 'pub_date']
+    for name in fields:
+        if API_FIELDS[name] not in columns:
+            columns.append(API_FIELDS[name])
+    return columns
+
+
+def _serialize(row, fields):
+    item = {name: row[API_FIELDS[name]] for name in fields}
+    if 'image' in item:
+        item['image'] = (
+            default_storage.url(item['image']) if item['image'] else None
+        )
+    return item
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _page_response(request, page, fields):
+    return JsonResponse({
+        'results': [_serialize(row, fields) for row in page],
+        'next': _page_url(request, page.paginator.next_cursor),
+        'previous': _page_url(request, page.paginator.previous_cursor),
+    })
+
+
+def _feed(request, post_list):
+    try:
+        fields = _selected_fields(request)
+    except ValueError as error:
+        return _error(f'Неизвестные поля: {error}', HTTPStatus.BAD_REQUEST)
+    page = paginator_for_posts(
+        request, post_list.values(*_columns(fields)), NUM_POSTS_PER_PAGE
+    )
+    return _page_response(request, page, fields)
+
+
+def posts(request):
+    """Все посты, от новых к старым."""
+    return _feed(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    """Посты сообщества."""
+    group = cached_get_object_or_404(Group, slug=slug)
+    return _feed(request, group.posts.all())
+
+
+def profile_posts(request, username):
+    """Посты автора."""
+    author = cached_get_object_or_404(User, username=username)
+    return _feed(request, author.posts.all())
+
+
+def follow(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        return _error('Требуется авторизация', HTTPStatus.UNAUTHORIZED)
+    try:
+        fields = _selected_fields(request)
+    except ValueError as error:
+        return _error(f'Неизвестные поля: {error}', HTTPStatus.BAD_REQUEST)
+    page = timeline_page(
+        request,
+        request.user,
+        NUM_POSTS_PER_PAGE,
+        posts=Post.objects.values(*_columns(fields)),
+    )
+    return _page_response(request, page, fields)
@@ -0,0 +1,207 @@
+"""Нагрузочные замеры вью постов через тестовый клиент.
+
+Данные сидируются пачками через bulk_create, после чего счётчики
+и ленты подписок пересчитываются так же, как это делают команды
+`recount` и `backfill_timelines`.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.object_cache import cached_get_object_or_404
+from .counters import recount_counters
+from .models import Comment, Follow, Group, Post
+from .timeline import add_author
+
+User = get_user_model()
+
+DEFAULT_VOLUMES = {
+    'users': 200,
+    'groups': 10,
+    'posts': 5000,
+    'comments': 10000,
+    'follows': 2000,
+}
+
+
+def seed(users, groups, posts, comments, follows, seed=0):
+    """Заполняет базу случайными данными заданного объёма."""
+    rng = random.Random(seed)
+    User.objects.bulk_create(
+        User(username=f'bench_{num}', password='!') for num in range(users)
+    )
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    Group.objects.bulk_create(
+        (
+            Group(
+                title=f'Группа {num}',
+                slug=f'bench-{num}',
+                description='Описание',
+            ) for num in range(groups)
+        )
+    )
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    Post.objects.bulk_create(
+        (
+            Post(
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids),
+                text=f'Пост {num} ' * 20,
+            ) for num in range(posts)
+        )
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=f'Комментарий {num}',
+            ) for num in range(comments)
+        )
+    )
+    pairs = set()
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = rng.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        Follow(user_id=u, author_id=a) for u, a in pairs
+    )
+    recount_counters()
+    for user_id, author_id in pairs:
+        add_author(user_id, author_id)
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def scenarios(rng):
+    """Запросы для замеров: имя вью и функция, выполняющая запрос."""
+    authors = list(User.objects.filter(
+        stats__posts_count__gt=0
+    ).values_list('username', flat=True)[:50])
+    followers = list(User.objects.filter(stats__following_count__gt=0)[:50])
+    groups = list(Group.objects.values_list('slug', flat=True)[:50])
+    posts = list(Post.objects.values_list('pk', flat=True)[:200])
+    guest = Client()
+    member = Client()
+    member.force_login(rng.choice(followers or list(User.objects.all()[:1])))
+
+    def url(name, *choices):
+        return reverse(name, args=[rng.choice(items) for items in choices])
+
+    return {
+        'posts:index': lambda: guest.get(url('posts:index')),
+        'posts:group_list': lambda: guest.get(
+            url('posts:group_list', groups)
+        ),
+        'posts:profile': lambda: guest.get(url('posts:profile', authors)),
+        'posts:post_detail': lambda: guest.get(
+            url('posts:post_detail', posts)
+        ),
+        'posts:follow_index': lambda: member.get(url('posts:follow_index')),
+        'posts:add_comment': lambda: member.post(
+            url('posts:add_comment', posts),
+            {'text': 'Комментарий из бенчмарка'},
+        ),
+    }
+
+
+def run_benchmarks(requests=50, warm=False, seed=0):
+    """Замеряет задержку, число запросов к базе и пик памяти.
+
+    Без `warm` кеш очищается перед каждым запросом, чтобы мерить
+    полный путь рендеринга, а не попадания во фрагментный кеш.
+    """
+    rng = random.Random(seed)
+    results = {}
+    for name, call in scenarios(rng).items():
+        latencies = []
+        for _ in range(requests):
+            if not warm:
+                cache.clear()
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        if not warm:
+            cache.clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            'requests': requests,
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'p50_ms': round(_percentile(latencies, 50), 3),
+            'p90_ms': round(_percentile(latencies, 90), 3),
+            'p99_ms': round(_percentile(latencies, 99), 3),
+            'max_ms': round(max(latencies), 3),
+            'queries': len(queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+    return results
+
+
+def _timings(call, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000000)
+    return {
+        'p50_us': round(_percentile(latencies, 50), 1),
+        'p90_us': round(_percentile(latencies, 90), 1),
+        'p99_us': round(_percentile(latencies, 99), 1),
+    }
+
+
+def run_cache_benchmarks(repeat=1000):
+    """Задержка операций кеша на реальных данных, в микросекундах.
+
+    Фрагмент — отрендеренная главная страница, объект — пост с автором
+    и группой из read-through кеша объектов.
+    """
+    cache.clear()
+    fragment = Client().get(reverse('posts:index')).content.decode()
+    post_id = Post.objects.values_list('pk', flat=True).first()
+    cache.set('bench:fragment', fragment)
+    cache.set('bench:generation', 0)
+    cached_get_object_or_404(Post, related=('author', 'group'), pk=post_id)
+    return {
+        'fragment_bytes': len(fragment.encode()),
+        'fragment_get': _timings(lambda: cache.get('bench:fragment'), repeat),
+        'fragment_set': _timings(
+            lambda: cache.set('bench:fragment', fragment), repeat
+        ),
+        'object_get': _timings(
+            lambda: cached_get_object_or_404(
+                Post, related=('author', 'group'), pk=post_id
+            ),
+            repeat,
+        ),
+        'generation_incr': _timings(
+            lambda: cache.incr('bench:generation'), repeat
+        ),
+    }
+
+
+def compare(baseline, current, metric='p90_ms'):
+    """Относительное изменение метрики по каждой вью, в процентах."""
+    changes = {}
+    for name, values in current.items():
+        before = baseline.get(name, {}).get(metric)
+        if before:
+            changes[name] = round((values[metric] - before) / before * 100, 1)
+    return changes
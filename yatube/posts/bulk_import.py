@@ -0,0 +1,264 @@
+"""Пакетная загрузка постов, комментариев и подписок.
+
+Строки NDJSON или CSV (формат `export_yatube`) читаются потоком.
+Авторов и группы можно указывать как id или как username и slug;
+имена разрешаются по словарям, собранным одним запросом. Записи
+вставляются `bulk_create` пачками, каждая пачка в своей транзакции.
+
+Id из источника не сохраняются: посты получают новые ключи, а пары
+(id в источнике, новый id) собираются в словарь `id_map`. Если база
+не возвращает ключи из `bulk_create`, посты пачки вставляются с
+временной меткой `import_key` и читаются по ней обратно. `post_id`
+комментариев разрешается только через этот словарь, поэтому
+комментарии грузятся с картой id от загрузки их постов. Строки
+с неизвестными авторами или постами пропускаются.
+
+`bulk_create` не шлёт сигналов: счётчики, индекс поиска и ленты
+подписок после загрузки нужно пересчитать отдельно.
+"""
+import csv
+import gzip
+import io
+import json
+import uuid
+from contextlib import contextmanager, nullcontext
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def open_rows(stream, fmt):
+    """Словари строк из бинарного потока; gzip распознаётся сам."""
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        return csv.DictReader(text)
+    return (json.loads(line) for line in text if line.strip())
+
+
+@contextmanager
+def _keep_dates(model, field_name):
+    """Отключает auto_now_add, чтобы сохранить даты из источника."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _int(value):
+    return int(value) if value not in (None, '') else None
+
+
+class _Resolver:
+    """Переводит username и slug в id по словарям в памяти.
+
+    Неизвестные имена и id превращаются в None.
+    """
+
+    def __init__(self, with_groups=False, id_map=None):
+        self.posts = id_map or {}
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.user_ids = set(self.users.values())
+        self.groups = (
+            dict(Group.objects.values_list('slug', 'pk'))
+            if with_groups else {}
+        )
+        self.group_ids = set(self.groups.values())
+
+    def user(self, row, field):
+        user_id = _int(row.get(f'{field}_id'))
+        if user_id is not None:
+            return user_id if user_id in self.user_ids else None
+        return self.users.get(row.get(field))
+
+    def group(self, row):
+        group_id = _int(row.get('group_id'))
+        if group_id is not None:
+            return group_id if group_id in self.group_ids else None
+        return self.groups.get(row.get('group'))
+
+    def post(self, row):
+        return self.posts.get(_int(row.get('post_id')))
+
+
+def _date(row, field):
+    value = row.get(field)
+    moment = parse_datetime(value) if value else None
+    if moment is None:
+        return timezone.now()
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _build_posts(rows, resolver):
+    for row in rows:
+        author_id = resolver.user(row, 'author')
+        if author_id is None or not row.get('text'):
+            yield None
+            continue
+        post = Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=resolver.group(row),
+            image=row.get('image') or '',
+            pub_date=_date(row, 'pub_date'),
+        )
+        post.source_id = _int(row.get('id'))
+        yield post
+
+
+def _build_comments(rows, resolver):
+    for row in rows:
+        author_id = resolver.user(row, 'author')
+        post_id = resolver.post(row)
+        if author_id is None or post_id is None or not row.get('text'):
+            yield None
+            continue
+        yield Comment(
+            post_id=post_id,
+            author_id=author_id,
+            text=row['text'],
+            created=_date(row, 'created'),
+        )
+
+
+def _build_follows(rows, resolver):
+    seen = set()
+    for row in rows:
+        pair = resolver.user(row, 'user'), resolver.user(row, 'author')
+        if None in pair or pair[0] == pair[1] or pair in seen:
+            yield None
+            continue
+        seen.add(pair)
+        yield Follow(user_id=pair[0], author_id=pair[1])
+
+
+def _new_comments(comments):
+    """Комментарии к несуществующим постам нарушили бы внешний ключ."""
+    post_ids = {comment.post_id for comment in comments}
+    known = set(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+    )
+    return [comment for comment in comments if comment.post_id in known]
+
+
+def _new_follows(follows):
+    """Подписки, которых ещё нет в базе."""
+    existing = set(Follow.objects.filter(
+        user_id__in={follow.user_id for follow in follows},
+        author_id__in={follow.author_id for follow in follows},
+    ).values_list('user_id', 'author_id'))
+    return [
+        follow for follow in follows
+        if (follow.user_id, follow.author_id) not in existing
+    ]
+
+
+# Имя загрузки: модель, сборщик объектов, фильтр пачки
+# и поле даты из источника.
+IMPORTS = {
+    'posts': (Post, _build_posts, None, 'pub_date'),
+    'comments': (Comment, _build_comments, _new_comments, 'created'),
+    'follows': (Follow, _build_follows, _new_follows, None),
+}
+
+
+def _tag_posts(posts):
+    """Помечает посты пачки уникальной меткой загрузки.
+
+    Если база не возвращает ключи из `bulk_create`, по метке
+    их находит `_resolve_pks`. Возвращает префикс меток пачки.
+    """
+    prefix = uuid.uuid4().hex
+    for index, post in enumerate(posts):
+        post.import_key = f'{prefix}:{index:08d}'
+    return prefix
+
+
+def _resolve_pks(posts, prefix):
+    """Читает ключи помеченных постов и снимает метки."""
+    tagged = Post.objects.filter(
+        import_key__gt=f'{prefix}:', import_key__lt=f'{prefix};'
+    )
+    by_key = {post.import_key: post for post in posts}
+    for key, pk in tagged.values_list('import_key', 'pk'):
+        by_key[key].pk = pk
+    tagged.update(import_key=None)
+    for post in posts:
+        post.import_key = None
+
+
+def _insert(model, objects, keep):
+    """Вставляет пачку; возвращает объекты и число новых строк."""
+    with transaction.atomic():
+        if keep is not None:
+            objects = keep(objects)
+        if model is Follow:
+            # Гонку с параллельной подпиской отсекает unique_follow,
+            # поэтому вставленное считаем по базе.
+            pairs = Follow.objects.filter(
+                user_id__in={obj.user_id for obj in objects},
+                author_id__in={obj.author_id for obj in objects},
+            )
+            before = pairs.count()
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            return objects, pairs.count() - before
+        returns_ids = connection.features.can_return_ids_from_bulk_insert
+        prefix = None
+        if model is Post and not returns_ids:
+            prefix = _tag_posts(objects)
+        # Размер пачки для INSERT Django подбирает под ограничения базы.
+        model.objects.bulk_create(objects)
+        if prefix is not None:
+            _resolve_pks(objects, prefix)
+    return objects, len(objects)
+
+
+def import_rows(name, rows, batch_size, id_map=None):
+    """Загружает строки пачками по `batch_size`.
+
+    Генератор: после каждой пачки отдаёт пару
+    (прочитано строк, вставлено записей) с начала загрузки.
+    Посты дописывают в `id_map` свои id из источника и новые id,
+    комментарии по нему находят свои посты.
+    """
+    model, build, keep, date_field = IMPORTS[name]
+    if id_map is None:
+        id_map = {}
+    resolver = _Resolver(with_groups=model is Post, id_map=id_map)
+    read = inserted = 0
+    batch = []
+
+    def flush():
+        objects, count = _insert(model, batch, keep)
+        if model is Post:
+            id_map.update(
+                (obj.source_id, obj.pk) for obj in objects
+                if obj.source_id is not None
+            )
+        return count
+
+    with _keep_dates(model, date_field) if date_field else nullcontext():
+        for obj in build(rows, resolver):
+            read += 1
+            if obj is not None:
+                batch.append(obj)
+            if len(batch) >= batch_size:
+                inserted += flush()
+                batch = []
+                yield read, inserted
+        if batch:
+            inserted += flush()
+        yield read, inserted
@@ -0,0 +1,76 @@
+from django.apps import apps as global_apps
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.object_cache import invalidate
+from .models import AuthorStats, Group, Post
+
+
+def _bump(queryset, field, delta):
+    """Атомарно сдвигает счётчик, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def bump_author(user_id, field, delta):
+    if user_id is None:
+        return
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if not _bump(stats, field, delta) and delta > 0:
+        AuthorStats.objects.get_or_create(user_id=user_id)
+        _bump(stats, field, delta)
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        _bump(Group.objects.filter(pk=group_id), 'posts_count', delta)
+        invalidate(Group, group_id)
+
+
+def bump_post(post_id, delta):
+    _bump(Post.objects.filter(pk=post_id), 'comments_count', delta)
+    invalidate(Post, post_id)
+
+
+def stats_for(user):
+    """Счётчики пользователя; нули, если строки ещё нет."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def _count(model, field, **filters):
+    """Подзапрос числа строк `model`, ссылающихся на внешнюю строку."""
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}, **filters
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def recount_counters(apps=global_apps):
+    """Пересчитывает все денормализованные счётчики с нуля.
+
+    Принимает реестр моделей, чтобы работать и из миграций.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = AuthorStats._meta.get_field('user').related_model
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk) for pk in missing.iterator()),
+        ignore_conflicts=True,
+    )
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+    Group.objects.update(posts_count=_count(Post, 'group'))
+    AuthorStats.objects.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author', user__isnull=False),
+        following_count=_count(Follow, 'user', author__isnull=False),
+    )
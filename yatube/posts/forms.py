@@ -1,5 +1,8 @@
+import json
+
 from django import forms
 
+from core.images import process_image
 from .models import Post, Comment
 
 
@@ -8,6 +11,28 @@ class PostForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['group'].empty_label = 'Группа не выбрана'
+        self.processed_image = None
+
+    def clean_image(self):
+        """Новая картинка сразу уменьшается и очищается от метаданных."""
+        image = self.cleaned_data['image']
+        if image and image is not self.initial.get('image'):
+            self.processed_image = process_image(image)
+        return image
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        processed = self.processed_image
+        if processed is not None:
+            post.image.save(processed.name, processed.original, save=False)
+            post.image_variants = json.dumps(processed.save_variants(
+                post.image.name, post.image.storage
+            ))
+        elif not post.image:
+            post.image_variants = ''
+        if commit:
+            post.save()
+        return post
 
     class Meta:
         model = Post
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.models import Follow, TimelineEntry
+from posts.timeline import add_author
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заполняет материализованные ленты подписок по таблице Follow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Заполнить ленту только одного пользователя (username).',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить существующие записи лент перед заполнением.',
+        )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.filter(
+            user__isnull=False, author__isnull=False
+        )
+        entries = TimelineEntry.objects.all()
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден.'
+                )
+            follows = follows.filter(user=user)
+            entries = entries.filter(user=user)
+        if options['clear']:
+            entries.delete()
+        total = 0
+        pairs = follows.order_by('user', 'author').values_list(
+            'user_id', 'author_id'
+        )
+        for user_id, author_id in pairs.iterator():
+            with transaction.atomic():
+                total += add_author(user_id, author_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано записей лент: {total}'
+        ))
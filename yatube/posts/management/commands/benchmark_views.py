@@ -0,0 +1,123 @@
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер вью постов на отдельной тестовой базе: '
+        'перцентили задержки, число SQL-запросов и пик памяти в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmarks.DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name} (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число запросов на каждую вью.',
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш между запросами.',
+        )
+        parser.add_argument(
+            '--cache', choices=sorted(settings.CACHE_BACKENDS),
+            default=settings.CACHE_STORAGE,
+            help='Какой кеш из CACHE_BACKENDS использовать.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--label', default='',
+            help='Метка прогона, например хеш коммита.',
+        )
+        parser.add_argument(
+            '--output', help='Куда записать JSON (по умолчанию stdout).',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона для сравнения p90.',
+        )
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Упасть, если p90 какой-либо вью вырос больше, чем на N%%.',
+        )
+
+    def handle(self, *args, **options):
+        volumes = {
+            name: options[name] for name in benchmarks.DEFAULT_VOLUMES
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        cache_dir = tempfile.mkdtemp()
+        caches = {'default': dict(settings.CACHE_BACKENDS[options['cache']])}
+        if 'LOCATION' in caches['default']:
+            # Замеры не должны трогать рабочий файл кеша.
+            caches['default']['LOCATION'] = os.path.join(
+                cache_dir, 'cache.sqlite3'
+            )
+        try:
+            with override_settings(DEBUG=False, CACHES=caches):
+                benchmarks.seed(seed=options['seed'], **volumes)
+                results = benchmarks.run_benchmarks(
+                    requests=options['requests'],
+                    warm=options['warm'],
+                    seed=options['seed'],
+                )
+                cache_results = benchmarks.run_cache_benchmarks()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        report = {
+            'label': options['label'],
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'volumes': volumes,
+            'cache': options['cache'],
+            'warm_cache': options['warm'],
+            'views': results,
+            'cache_operations': cache_results,
+        }
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(payload)
+        else:
+            self.stdout.write(payload)
+        if options['compare']:
+            self.compare(options['compare'], results, options)
+
+    def compare(self, path, results, options):
+        with open(path) as baseline:
+            baseline = json.load(baseline)['views']
+        changes = benchmarks.compare(baseline, results)
+        for name, change in changes.items():
+            sys.stderr.write(f'{name}: p90 {change:+.1f}%\n')
+        limit = options['max_regression']
+        regressed = [
+            name for name, change in changes.items()
+            if limit is not None and change > limit
+        ]
+        if regressed:
+            raise CommandError(
+                f'p90 вырос больше чем на {limit}%: {", ".join(regressed)}'
+            )
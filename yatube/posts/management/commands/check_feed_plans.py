@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.paginator_custome import NEXT, encode_cursor
+from posts import views
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+DUMMY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
+
+def plan_problems(vendor, plan):
+    """Строки плана, означающие полный проход по таблице
+    или сортировку во временной структуре.
+    """
+    problems = []
+    for line in plan:
+        if vendor == 'sqlite':
+            full_scan = line.startswith('SCAN') and 'USING' not in line
+            if full_scan or 'USE TEMP B-TREE' in line:
+                problems.append(line)
+        elif 'Seq Scan' in line or line.lstrip(' ->').startswith('Sort'):
+            problems.append(line)
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет через EXPLAIN, что запросы лент используют индексы '
+        'и не сортируют во временных структурах.'
+    )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in EXPLAIN_PREFIXES:
+            raise CommandError(f'EXPLAIN для {vendor} не поддерживается.')
+        queries = self.capture_feed_queries()
+        failures = []
+        with connection.cursor() as cursor:
+            for view_name, sql in queries:
+                cursor.execute(EXPLAIN_PREFIXES[vendor] + sql)
+                plan = [str(row[-1]) for row in cursor.fetchall()]
+                problems = plan_problems(vendor, plan)
+                if problems:
+                    failures.append((view_name, sql, problems))
+        for view_name, sql, problems in failures:
+            self.stderr.write(f'{view_name}: {sql}')
+            for problem in problems:
+                self.stderr.write(f'    {problem}')
+        if failures:
+            raise CommandError(
+                f'Запросов без подходящего индекса: {len(failures)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено запросов лент: {len(queries)}'
+        ))
+
+    def capture_feed_queries(self):
+        """Выполняет вью лент на первой и следующей странице
+        и собирает их SELECT-запросы.
+        """
+        post = Post.objects.order_by('-pub_date', '-pk').first()
+        if post is None:
+            raise CommandError('Нет постов для проверки планов.')
+        group = Group.objects.filter(posts__isnull=False).first()
+        follow = Follow.objects.filter(
+            user__isnull=False, author__isnull=False
+        ).select_related('user', 'author').first()
+        user = follow.user if follow else post.author
+        calls = [
+            ('posts:index', views.index, ()),
+            ('posts:profile', views.profile, (post.author.username,)),
+            ('posts:post_detail', views.post_detail, (post.pk,)),
+            ('posts:follow_index', views.follow_index, ()),
+        ]
+        if group is not None:
+            calls.append(
+                ('posts:group_list', views.group_posts, (group.slug,))
+            )
+        cursor = encode_cursor(NEXT, post.pub_date, post.pk)
+        factory = RequestFactory()
+        queries = []
+        with override_settings(CACHES=DUMMY_CACHES):
+            for view_name, view, args in calls:
+                for params in ({}, {'cursor': cursor}):
+                    request = factory.get('/', params)
+                    request.user = user
+                    with CaptureQueriesContext(connection) as captured:
+                        view(request, *args)
+                    queries.extend(
+                        (view_name, query['sql'])
+                        for query in captured.captured_queries
+                        if query['sql'].startswith('SELECT')
+                    )
+        return queries
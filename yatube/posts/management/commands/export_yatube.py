@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.dates import parse_since
+from posts.export import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты, комментарии или подписки '
+        'в NDJSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument(
+            '--format', choices=sorted(FORMATS), default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Только записи с этой даты (ISO); подписки выгружаются все.',
+        )
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='Файл для записи; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError:
+                raise CommandError(f'Неверная дата: {options["since"]}')
+        chunks = stream_export(
+            options['name'], options['format'], since, options['gzip']
+        )
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, chunks)
+        else:
+            with open(options['output'], 'wb') as output:
+                self.write(output, chunks)
+
+    @staticmethod
+    def write(output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
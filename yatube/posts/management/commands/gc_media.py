@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.storage import collect_garbage
+from posts.models import Post
+
+
+# Сколько имён проверять одним запросом: у SQLite ограничена
+# глубина выражения WHERE.
+CHUNK_SIZE = 100
+
+
+def referenced(names):
+    """Имена из `names`, на которые ссылаются посты."""
+    names = sorted(names)
+    found = set()
+    for start in range(0, len(names), CHUNK_SIZE):
+        chunk = names[start:start + CHUNK_SIZE]
+        query = Q(image__in=chunk)
+        for name in chunk:
+            query |= Q(image_variants__contains=f'"{name}"')
+        posts = Post.objects.filter(query).only('image', 'image_variants')
+        for post in posts:
+            found |= post.media_names & set(chunk)
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из контент-адресуемого хранилища файлы, '
+        'на которые больше не ссылается ни один пост, вместе с миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Не трогать файлы, изменённые за это число секунд.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+
+    def handle(self, *args, **options):
+        garbage = collect_garbage(
+            default_storage,
+            timedelta(seconds=options['grace']),
+            referenced=referenced,
+            dry_run=options['dry_run'],
+        )
+        for name in garbage:
+            self.stdout.write(name)
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} файлов: {len(garbage)}'
+        ))
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.feed_cache import bump_feed_generation
+from posts.bulk_import import IMPORTS, import_rows, open_rows
+from posts.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетно загружает посты, комментарии или подписки '
+        'из NDJSON или CSV (можно сжатых gzip).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(IMPORTS))
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='Файл для чтения; по умолчанию stdin.',
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Формат; по умолчанию определяется по имени файла.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько записей вставлять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--id-map',
+            help='JSON-файл с соответствием id постов из источника '
+                 'новым id: загрузка постов дописывает его, загрузка '
+                 'комментариев по нему находит посты (обязателен).',
+        )
+
+    def read_id_map(self, options):
+        path = options['id_map']
+        if path is None:
+            if options['name'] == 'comments':
+                raise CommandError(
+                    'Для комментариев нужна карта id постов: --id-map.'
+                )
+            return {}
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as source:
+            return {
+                int(source_id): pk
+                for source_id, pk in json.load(source).items()
+            }
+
+    def write_id_map(self, options, id_map):
+        if options['id_map'] is None or options['name'] != 'posts':
+            return
+        with open(options['id_map'], 'w', encoding='utf-8') as target:
+            json.dump(id_map, target)
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or (
+            'csv' if '.csv' in path else 'ndjson'
+        )
+        id_map = self.read_id_map(options)
+        started_at = timezone.now()
+        try:
+            if path == '-':
+                read, inserted, elapsed = self.load(
+                    sys.stdin.buffer, fmt, options, id_map
+                )
+            else:
+                with open(path, 'rb') as stream:
+                    read, inserted, elapsed = self.load(
+                        stream, fmt, options, id_map
+                    )
+        finally:
+            # Уже вставленные пачки остаются в базе, их id тоже нужны.
+            self.write_id_map(options, id_map)
+        recount_counters()
+        bump_feed_generation()
+        rate = read / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: прочитано {read} строк, вставлено {inserted} '
+            f'за {elapsed:.1f} с ({rate:.1f} строк/с)'
+        ))
+        if options['name'] == 'posts':
+            self.stdout.write(
+                'Обновите индекс поиска: rebuild_search_index '
+                f'--since {started_at.isoformat()}'
+            )
+        if options['name'] in ('posts', 'follows'):
+            self.stdout.write('Обновите ленты подписок: backfill_timelines')
+
+    def load(self, stream, fmt, options, id_map):
+        started = time.perf_counter()
+        read = inserted = 0
+        rows = open_rows(stream, fmt)
+        try:
+            for read, inserted in import_rows(
+                options['name'], rows, options['batch_size'], id_map
+            ):
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Прочитано строк: {read}, вставлено: {inserted}, '
+                    f'{read / elapsed:.1f} строк/с'
+                )
+        except ValueError as error:
+            raise CommandError(f'Неверные данные после строки {read}: {error}')
+        return read, inserted, time.perf_counter() - started
@@ -0,0 +1,62 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.dates import parse_since
+from core.pool import Progress, ordered_map, process_pool
+from posts.models import Post
+from posts.search import replace_postings, tokenize_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс постов потоково: посты читаются '
+        'пачками, разбиваются на слова в пуле процессов и записываются '
+        'пачками в отдельных транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов читать и записывать за раз.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 выполняет всё в текущем процессе.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Только посты, созданные или изменённые с этой даты '
+                 '(ISO, например 2026-10-01 или 2026-10-01T12:00).',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by()
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError:
+                raise CommandError(f'Неверная дата: {options["since"]}')
+            posts = posts.filter(
+                Q(pub_date__gte=since) | Q(updated__gte=since)
+            )
+        batch_size = options['batch_size']
+        workers = options['workers']
+        rows = posts.values_list('pk', 'text').iterator(chunk_size=batch_size)
+        batches = iter(lambda: list(islice(rows, batch_size)), [])
+        progress = Progress()
+        with process_pool(workers) as executor:
+            tokenized = ordered_map(executor, tokenize_rows, batches, workers)
+            for batch, postings in tokenized:
+                replace_postings([pk for pk, _ in batch], postings)
+                progress.add(len(batch))
+                self.stdout.write(
+                    f'Проиндексировано постов: {progress.count}, '
+                    f'{progress.rate:.1f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {progress.count} постов за {progress.elapsed:.1f} с '
+            f'({progress.rate:.1f} строк/с)'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.feed_cache import bump_feed_generation
+from posts.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов, групп и авторов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recount_counters()
+        # Счётчики выводятся в лентах и профилях.
+        bump_feed_generation()
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
+        # Авторы могли перейти порог популярности мимо сигналов.
+        self.stdout.write('Обновите ленты подписок: backfill_timelines')
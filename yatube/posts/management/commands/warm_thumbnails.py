@@ -0,0 +1,88 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.pool import Progress, ordered_map, process_pool
+from core.thumbnails import render_thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее генерирует миниатюры всех картинок постов '
+        'в пуле процессов. Прерванный запуск продолжается с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов читать из базы за раз.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 выполняет всё в текущем процессе.',
+        )
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(settings.MEDIA_ROOT, '.warm_thumbnails'),
+            help='Файл с id последнего обработанного поста.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первого поста, игнорируя сохранённое состояние.',
+        )
+
+    def handle(self, *args, **options):
+        state_file = options['state_file']
+        last_pk = 0 if options['restart'] else self.read_state(state_file)
+        if last_pk:
+            self.stdout.write(f'Продолжаем после поста {last_pk}')
+        workers = options['workers']
+        progress = Progress()
+        thumbnails = 0
+        with process_pool(workers) as executor:
+            while True:
+                batch = list(
+                    Post.objects.exclude(image='').filter(
+                        pk__gt=last_pk
+                    ).order_by('pk').values_list(
+                        'pk', 'image'
+                    )[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                names = [name for _, name in batch]
+                results = ordered_map(
+                    executor, render_thumbnails, names, workers
+                )
+                thumbnails += sum(count for _, count in results)
+                progress.add(len(batch))
+                last_pk = batch[-1][0]
+                self.write_state(state_file, last_pk)
+                self.stdout.write(
+                    f'Обработано картинок: {progress.count}, '
+                    f'{progress.rate:.1f} картинок/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {progress.count} картинок, {thumbnails} миниатюр '
+            f'за {progress.elapsed:.1f} с ({progress.rate:.1f} картинок/с)'
+        ))
+
+    @staticmethod
+    def read_state(state_file):
+        try:
+            with open(state_file) as state:
+                return int(state.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def write_state(state_file, last_pk):
+        directory = os.path.dirname(state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{state_file}.tmp'
+        with open(temporary, 'w') as state:
+            state.write(str(last_pk))
+        os.replace(temporary, state_file)
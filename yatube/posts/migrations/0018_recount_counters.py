@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, field, **filters):
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}, **filters
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def recount(apps, schema_editor):
+    """Заполняет счётчики, добавленные в 0016 и 0017.
+
+    Повторяет `posts.counters.recount_counters` на моделях миграции,
+    чтобы не зависеть от текущего кода.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = AuthorStats._meta.get_field('user').related_model
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk) for pk in missing.iterator()),
+        ignore_conflicts=True,
+    )
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+    Group.objects.update(posts_count=_count(Post, 'group'))
+    AuthorStats.objects.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author', user__isnull=False),
+        following_count=_count(Follow, 'user', author__isnull=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_auto_20261018_0438'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+import re
+from collections import Counter
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def build(apps, schema_editor):
+    """Строит индекс поиска по всем постам.
+
+    Разбор текста из `posts.search` повторён здесь, чтобы миграция
+    не зависела от текущего кода: нижний регистр, «ё» как «е»,
+    слова от двух букв, обрезанные до длины поля.
+    """
+    Post = apps.get_model('posts', 'Post')
+    SearchPosting = apps.get_model('posts', 'SearchPosting')
+    max_length = SearchPosting._meta.get_field('term').max_length
+    SearchPosting.objects.all().delete()
+    batch = []
+    rows = Post.objects.values_list('pk', 'text').iterator(
+        chunk_size=BATCH_SIZE
+    )
+    for pk, text in rows:
+        tokens = Counter(
+            token[:max_length]
+            for token in re.findall(r'\w+', text.lower().replace('ё', 'е'))
+            if len(token) >= 2
+        )
+        batch.extend(
+            SearchPosting(term=term, post_id=pk, weight=weight)
+            for term, weight in tokens.items()
+        )
+        if len(batch) >= BATCH_SIZE:
+            SearchPosting.objects.bulk_create(batch)
+            batch = []
+    SearchPosting.objects.bulk_create(batch)
+
+
+def clear(apps, schema_editor):
+    apps.get_model('posts', 'SearchPosting').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_auto_20261018_0445'),
+    ]
+
+    operations = [
+        migrations.RunPython(build, clear),
+    ]
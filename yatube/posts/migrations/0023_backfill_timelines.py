@@ -0,0 +1,57 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """Заполняет ленты подписок, созданные пустыми в 0015.
+
+    Логика `posts.timeline` повторена здесь, чтобы миграция не зависела
+    от текущего кода: посты популярных авторов не раздаются, они
+    подмешиваются при чтении.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    follows = Follow.objects.filter(user__isnull=False, author__isnull=False)
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    if threshold is not None:
+        follows = follows.exclude(author_id__in=AuthorStats.objects.filter(
+            followers_count__gte=threshold
+        ).values('user_id'))
+    pairs = follows.order_by('user', 'author').values_list(
+        'user_id', 'author_id'
+    )
+    for user_id, author_id in pairs.iterator():
+        posts = Post.objects.filter(author_id=author_id).order_by()
+        entries = (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            ) for post_id, pub_date in posts.values_list(
+                'pk', 'pub_date'
+            ).iterator()
+        )
+        batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+        while batch:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+
+
+def clear(apps, schema_editor):
+    apps.get_model('posts', 'TimelineEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
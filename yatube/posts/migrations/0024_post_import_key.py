@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_backfill_timelines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='import_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Заполнена только внутри транзакции bulk_import', max_length=64, null=True, verbose_name='Метка загрузки'),
+        ),
+    ]
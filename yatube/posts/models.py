@@ -1,10 +1,55 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
 User = get_user_model()
 
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'image',
+    'image_variants',
+    'comments_count',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+)
+
+
+class CountersModel(models.Model):
+    """Модель с денормализованными счётчиками.
+
+    Счётчики меняются только атомарными F()-обновлениями, поэтому
+    обычное сохранение существующей строки их не пишет: у экземпляра
+    из кеша или формы значения могли устареть.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
 
-class Group(models.Model):
+class Group(CountersModel):
     """Модель сообщества."""
     title = models.CharField(max_length=200)
     slug = models.SlugField(
@@ -13,6 +58,13 @@ class Group(models.Model):
         verbose_name='URL'
     )
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('posts_count',)
 
     class Meta:
         verbose_name = 'Группа'
@@ -22,10 +74,27 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    """Запросы к постам."""
+
+    def for_feed(self):
+        """Посты со всем, что выводят ленты, за один запрос.
+
+        Автор и группа подтягиваются join-ом, лишние колонки
+        не читаются, число комментариев хранится в самом посте.
+        """
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
+class Post(CountersModel):
     """Модель публикаций."""
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -44,16 +113,80 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False,
+        help_text='JSON: {формат: [[ширина, имя файла], ...]}'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    import_key = models.CharField(
+        'Метка загрузки',
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='Заполнена только внутри транзакции bulk_import'
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    counter_fields = ('comments_count',)
 
     class Meta:
         ordering = ['-pub_date']
         get_latest_by = 'pub_date'
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date', 'id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def variants(self):
+        """Готовые варианты картинки: {формат: [(ширина, имя), ...]}.
+
+        Пустое или испорченное поле означает, что вариантов нет.
+        """
+        try:
+            variants = json.loads(self.image_variants or '{}')
+            return {
+                fmt: [(int(width), name) for width, name in items]
+                for fmt, items in variants.items()
+            }
+        except (AttributeError, TypeError, ValueError):
+            return {}
+
+    @property
+    def media_names(self):
+        """Имена всех файлов поста в хранилище: картинка и её варианты."""
+        names = {
+            name for variants in self.variants.values()
+            for _, name in variants
+        }
+        if self.image:
+            names.add(self.image.name)
+        return names
+
 
 class Comment(models.Model):
     """Модель комментариев."""
@@ -74,6 +207,12 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.post
@@ -102,6 +241,110 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f' Пользователь {self.user} подписан на {self.authors}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики пользователя.
+
+    Поддерживаются сигналами через атомарные F()-обновления,
+    расхождения исправляет команда `recount`.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0, db_index=True)
+    following_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики автора'
+        verbose_name_plural = 'Счётчики авторов'
+
+    def __str__(self) -> str:
+        return f'Счётчики пользователя {self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    """Запись персональной ленты подписок.
+
+    Лента материализуется при публикации поста (fan-out on write),
+    поэтому страница подписок читается одним диапазоном по индексу
+    (user, pub_date, post) без join-а через Follow.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Пост {self.post_id} в ленте {self.user_id}'
+
+
+class SearchPosting(models.Model):
+    """Запись инвертированного индекса: слово и пост, где оно встречается.
+
+    Поиск читает по индексу (term, post) только списки постов
+    нужных слов, а не сканирует тексты всех постов.
+    """
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='postings'
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='unique_search_posting'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.term} в посте {self.post_id}'
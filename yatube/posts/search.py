@@ -0,0 +1,80 @@
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Post, SearchPosting
+
+TOKEN_RE = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = SearchPosting._meta.get_field('term').max_length
+
+
+def tokenize(text):
+    """Слова текста с частотами: нижний регистр, «ё» как «е»."""
+    text = text.lower().replace('ё', 'е')
+    return Counter(
+        token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall(text)
+        if len(token) >= MIN_TOKEN_LENGTH
+    )
+
+
+def postings_for(post_id, text, model=SearchPosting):
+    return [
+        model(term=term, post_id=post_id, weight=weight)
+        for term, weight in tokenize(text).items()
+    ]
+
+
+def tokenize_rows(rows):
+    """Записи индекса для пачки пар (id поста, текст) в виде кортежей.
+
+    Возвращает простые кортежи, чтобы дёшево передавать их из пула.
+    """
+    return [
+        (pk, term, weight)
+        for pk, text in rows
+        for term, weight in tokenize(text).items()
+    ]
+
+
+def replace_postings(post_ids, postings):
+    """Заменяет записи индекса постов одной транзакцией."""
+    with transaction.atomic():
+        SearchPosting.objects.filter(post__in=post_ids).delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(post_id=pk, term=term, weight=weight)
+            for pk, term, weight in postings
+        ])
+
+
+def index_post(post):
+    """Перестраивает записи индекса одного поста."""
+    with transaction.atomic():
+        SearchPosting.objects.filter(post=post).delete()
+        SearchPosting.objects.bulk_create(postings_for(post.pk, post.text))
+
+
+def matching_ids(query):
+    """Подзапрос id постов, содержащих хотя бы одно слово запроса."""
+    return SearchPosting.objects.filter(
+        term__in=list(tokenize(query))
+    ).values('post')
+
+
+def search(query, queryset=None):
+    """Посты по запросу, самые релевантные первыми.
+
+    Выше стоят посты, где нашлось больше разных слов запроса,
+    затем с большим числом вхождений, затем более новые.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    terms = list(tokenize(query))
+    if not terms:
+        return queryset.none()
+    return queryset.filter(postings__term__in=terms).annotate(
+        matched=Count('postings'),
+        relevance=Sum('postings__weight'),
+    ).order_by('-matched', '-relevance', '-pub_date', '-pk')
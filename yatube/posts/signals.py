@@ -0,0 +1,163 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import storage
+from core.feed_cache import bump_feed_generation
+from core.page_cache import bump_page_scope
+from core.thumbnails import schedule_thumbnails
+from . import counters, search, timeline
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в лентах.
+AUTHOR_DISPLAY_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feeds(sender, **kwargs):
+    """Сбрасывает закешированные ленты при изменении
+    постов, групп и комментариев.
+    """
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_feeds(sender, update_fields=None, **kwargs):
+    """Сбрасывает ленты, если могло поменяться имя автора.
+
+    Сохранения только служебных полей (например, last_login
+    при входе) ленты не трогают.
+    """
+    if update_fields is None or AUTHOR_DISPLAY_FIELDS & set(update_fields):
+        bump_feed_generation()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_profiles(sender, instance, created=True, **kwargs):
+    """Сбрасывает профили подписчика и автора: на них числа подписок.
+
+    У post_delete нет аргумента created, удаление всегда учитывается.
+    """
+    if not created:
+        return
+    usernames = User.objects.filter(
+        pk__in=(instance.user_id, instance.author_id)
+    ).values_list('username', flat=True)
+    for username in usernames:
+        bump_page_scope('posts:profile', username)
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnails(sender, instance, **kwargs):
+    """Готовит миниатюры картинки поста в фоне.
+
+    Картинкам, загруженным через форму, хватает готовых вариантов.
+    """
+    if instance.image and not instance.variants:
+        schedule_thumbnails(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    """Раздаёт новый пост в ленты подписчиков."""
+    if created:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_for_search(sender, instance, update_fields, **kwargs):
+    """Обновляет поисковый индекс поста при изменении текста."""
+    if update_fields is None or 'text' in update_fields:
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline(sender, instance, created, **kwargs):
+    """Добавляет посты автора в ленту при подписке."""
+    if created and instance.user_id and instance.author_id:
+        timeline.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline(sender, instance, **kwargs):
+    """Убирает посты автора из ленты при отписке."""
+    if instance.user_id and instance.author_id:
+        timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    """Запоминает прежние группу и файлы поста для пересчёта счётчиков."""
+    instance._old_group_id = None
+    instance._old_media = set()
+    if instance.pk is not None:
+        previous = Post.objects.filter(pk=instance.pk).only(
+            'group', 'image', 'image_variants'
+        ).first()
+        if previous is not None:
+            instance._old_group_id = previous.group_id
+            instance._old_media = previous.media_names
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_author(instance.author_id, 'posts_count', 1)
+        counters.bump_group(instance.group_id, 1)
+    elif instance._old_group_id != instance.group_id:
+        counters.bump_group(instance._old_group_id, -1)
+        counters.bump_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, 'posts_count', -1)
+    counters.bump_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created and instance.user_id and instance.author_id:
+        counters.bump_author(instance.author_id, 'followers_count', 1)
+        counters.bump_author(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    if instance.user_id and instance.author_id:
+        counters.bump_author(instance.author_id, 'followers_count', -1)
+        counters.bump_author(instance.user_id, 'following_count', -1)
+        timeline.demote_if_needed(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def count_media_references(sender, instance, **kwargs):
+    """Пересчитывает ссылки на файлы, если картинка поменялась."""
+    names = instance.media_names
+    storage.retain(names - instance._old_media)
+    storage.release(instance._old_media - names)
+
+
+@receiver(post_delete, sender=Post)
+def release_media(sender, instance, **kwargs):
+    storage.release(instance.media_names)
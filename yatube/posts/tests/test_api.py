@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {num}', group=cls.group
+            ) for num in range(settings.NUM_POSTS_PER_PAGE + 3)
+        ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTests.user)
+
+    def test_feeds_are_paginated(self):
+        """Все ленты отдают страницы и ссылку на следующую."""
+        urls = (
+            reverse('api:posts'),
+            reverse('api:group_posts', args=(self.group.slug,)),
+            reverse('api:profile_posts', args=(self.author.username,)),
+            reverse('api:follow'),
+        )
+        expected = [post.pk for post in reversed(self.posts)]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.authorized_client.get(url).json()
+                self.assertEqual(
+                    len(data['results']), settings.NUM_POSTS_PER_PAGE
+                )
+                rest = self.authorized_client.get(data['next']).json()
+                self.assertIsNone(rest['next'])
+                self.assertEqual(
+                    [item['id'] for item in data['results'] + rest['results']],
+                    expected,
+                )
+
+    def test_item_shape(self):
+        """Пост сериализуется в плоский словарь."""
+        item = self.client.get(reverse('api:posts')).json()['results'][0]
+        post = self.posts[-1]
+        self.assertEqual(item, {
+            'id': post.pk,
+            'text': post.text,
+            'pub_date': item['pub_date'],
+            'author': 'auth',
+            'group': 'test-slug',
+            'image': None,
+            'comments_count': 0,
+        })
+
+    def test_fields(self):
+        """?fields= ограничивает набор полей и сохраняется в ссылках."""
+        url = reverse('api:posts')
+        data = self.client.get(url, {'fields': 'id,author'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertIn('fields=id%2Cauthor', data['next'])
+        rest = self.client.get(data['next']).json()
+        self.assertEqual(set(rest['results'][0]), {'id', 'author'})
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['error'])
+
+    def test_queries(self):
+        """Страница ленты читается одним запросом."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:posts'))
+
+    def test_follow_requires_login(self):
+        """Лента подписок доступна только авторизованным."""
+        response = self.client.get(reverse('api:follow'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_missing_group(self):
+        """Для несуществующей группы отдаётся 404."""
+        response = self.client.get(
+            reverse('api:group_posts', args=('missing',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,477 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import MediaFile
+from core.thumbnails import cached_thumbnail
+from posts import benchmarks, bulk_import
+from posts.management.commands.check_feed_plans import plan_problems
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, Post, SearchPosting
+)
+
+User = get_user_model()
+
+
+class CheckFeedPlansTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for num in range(3):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {num}', group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=cls.user, text='Комментарий'
+            )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы всех лент проходят проверку планов."""
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out, stderr=StringIO())
+        self.assertIn('Проверено запросов лент', out.getvalue())
+
+    def test_plan_problems(self):
+        """Полный проход и временная сортировка считаются проблемой."""
+        cases = (
+            ('sqlite', 'SCAN posts_post', True),
+            ('sqlite', 'SCAN TABLE posts_post', True),
+            ('sqlite', 'USE TEMP B-TREE FOR ORDER BY', True),
+            ('sqlite', 'SCAN posts_post USING INDEX post_pub_date_idx', False),
+            ('sqlite', 'SEARCH posts_post USING INDEX x (author_id=?)', False),
+            ('postgresql', 'Seq Scan on posts_post', True),
+            ('postgresql', '  ->  Sort  (cost=1.0..2.0 rows=1)', True),
+            ('postgresql', 'Index Scan using post_pub_date_idx', False),
+        )
+        for vendor, line, is_problem in cases:
+            with self.subTest(line=line):
+                self.assertEqual(
+                    bool(plan_problems(vendor, [line])), is_problem
+                )
+
+
+class RecountTests(TestCase):
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет разошедшиеся счётчики."""
+        author = User.objects.create_user(username='auth')
+        user = User.objects.create_user(username='noname')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        post = Post.objects.create(author=author, text='Пост', group=group)
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        Follow.objects.create(user=user, author=author)
+        Post.objects.update(comments_count=7)
+        Group.objects.update(posts_count=7)
+        AuthorStats.objects.all().delete()
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        self.assertEqual(Group.objects.get(pk=group.pk).posts_count, 1)
+        stats = AuthorStats.objects.get(user=author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count, stats.following_count),
+            (1, 1, 0)
+        )
+        self.assertEqual(AuthorStats.objects.get(user=user).following_count, 1)
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        author = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(
+                author=author,
+                text=f'Пост {num}',
+                image=SimpleUploadedFile(
+                    name='small.gif',
+                    content=small_gif,
+                    content_type='image/gif'
+                )
+            ) for num in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_warm_thumbnails_is_resumable(self):
+        """Команда готовит все миниатюры и продолжает с места остановки."""
+        state_file = os.path.join(TEMP_MEDIA_ROOT, 'state')
+        out = StringIO()
+        call_command(
+            'warm_thumbnails', workers=0, batch_size=2,
+            state_file=state_file, stdout=out
+        )
+        self.assertIn('Готово: 3 картинок', out.getvalue())
+        for post in WarmThumbnailsTests.posts:
+            with self.subTest(post=post.pk):
+                self.assertIsNotNone(cached_thumbnail(
+                    post.image, '960x339', crop='center', upscale=True
+                ))
+        with open(state_file) as state:
+            self.assertEqual(
+                int(state.read()), WarmThumbnailsTests.posts[-1].pk
+            )
+        out = StringIO()
+        call_command(
+            'warm_thumbnails', workers=0, state_file=state_file, stdout=out
+        )
+        self.assertIn('Готово: 0 картинок', out.getvalue())
+
+
+class BenchmarkTests(TestCase):
+    def test_run_benchmarks_reports_every_view(self):
+        """Бенчмарк заполняет базу и измеряет все вью."""
+        benchmarks.seed(users=5, groups=2, posts=20, comments=10, follows=5)
+        self.assertEqual(Post.objects.count(), 20)
+        results = benchmarks.run_benchmarks(requests=2)
+        self.assertEqual(set(results), {
+            'posts:index', 'posts:group_list', 'posts:profile',
+            'posts:post_detail', 'posts:follow_index', 'posts:add_comment',
+        })
+        for name, stats in results.items():
+            with self.subTest(view=name):
+                self.assertEqual(stats['requests'], 2)
+                self.assertGreater(stats['queries'], 0)
+                self.assertLessEqual(stats['p50_ms'], stats['max_ms'])
+
+    def test_compare(self):
+        """Сравнение считает изменение p90 в процентах."""
+        baseline = {'posts:index': {'p90_ms': 10.0}}
+        current = {'posts:index': {'p90_ms': 12.5}}
+        self.assertEqual(
+            benchmarks.compare(baseline, current), {'posts:index': 25.0}
+        )
+
+
+class RebuildSearchIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        author = User.objects.create_user(username='auth')
+        cls.old = Post.objects.create(author=author, text='Старый пост')
+        cls.new = Post.objects.create(author=author, text='Новый пост')
+        long_ago = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=long_ago, updated=long_ago
+        )
+
+    def terms(self):
+        return set(SearchPosting.objects.values_list('term', flat=True))
+
+    def test_full_rebuild(self):
+        """Команда восстанавливает индекс всех постов."""
+        SearchPosting.objects.all().delete()
+        out = StringIO()
+        call_command(
+            'rebuild_search_index', workers=0, batch_size=1, stdout=out
+        )
+        self.assertEqual(self.terms(), {'старый', 'новый', 'пост'})
+        self.assertIn('Готово: 2 постов', out.getvalue())
+        self.assertIn('строк/с', out.getvalue())
+
+    def test_since(self):
+        """С --since переиндексируются только свежие посты."""
+        SearchPosting.objects.all().delete()
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        call_command(
+            'rebuild_search_index', workers=0, since=since, stdout=StringIO()
+        )
+        self.assertEqual(self.terms(), {'новый', 'пост'})
+        with self.assertRaises(CommandError):
+            call_command('rebuild_search_index', since='вчера')
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.old = Post.objects.create(author=cls.author, text='Старый пост')
+        cls.new = Post.objects.create(author=cls.author, text='Новый пост')
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        Comment.objects.create(
+            post=cls.new, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'export')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_ndjson(self):
+        """Каждая строка NDJSON — отдельная запись."""
+        call_command('export_yatube', 'posts', output=self.path)
+        with open(self.path, encoding='utf-8') as export:
+            rows = [json.loads(line) for line in export]
+        self.assertEqual(
+            [row['text'] for row in rows], ['Старый пост', 'Новый пост']
+        )
+        self.assertEqual(rows[1]['author_id'], self.author.pk)
+
+    def test_csv_gzip_since(self):
+        """CSV сжимается, а --since отсекает старые записи."""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        call_command(
+            'export_yatube', 'posts', format='csv', gzip=True, since=since,
+            output=self.path,
+        )
+        with gzip.open(self.path, 'rt', encoding='utf-8') as export:
+            rows = list(csv.DictReader(export))
+        self.assertEqual([row['text'] for row in rows], ['Новый пост'])
+        with self.assertRaises(CommandError):
+            call_command('export_yatube', 'posts', since='вчера')
+
+    def test_view_streams_for_staff(self):
+        """Выгрузка по HTTP потоковая и доступна только персоналу."""
+        url = reverse('export', args=('follows',))
+        client = Client()
+        client.force_login(self.user)
+        self.assertNotEqual(client.get(url).status_code, HTTPStatus.OK)
+        client.force_login(self.staff)
+        response = client.get(url, {'format': 'csv', 'gzip': '1'})
+        self.assertTrue(response.streaming)
+        self.assertIn('follows.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(
+            content.decode().splitlines(),
+            ['id,user_id,author_id', f'{Follow.objects.get().pk},'
+             f'{self.user.pk},{self.author.pk}'],
+        )
+        response = client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content, compress=False):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if compress else open
+        with opener(path, 'wt', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def test_posts(self):
+        """Посты грузятся пачками с датами источника и счётчиками."""
+        rows = [
+            {'id': num + 10, 'text': f'Пост {num}', 'author': 'auth',
+             'group': 'test-slug', 'pub_date': '2020-01-02T03:04:05+00:00'}
+            for num in range(5)
+        ] + [{'text': 'Без автора', 'author': 'missing'}]
+        path = self.write(
+            'posts.ndjson', ''.join(json.dumps(row) + '\n' for row in rows)
+        )
+        id_map = os.path.join(self.directory, 'ids.json')
+        out = StringIO()
+        call_command(
+            'import_yatube', 'posts', path, batch_size=2, id_map=id_map,
+            stdout=out
+        )
+        self.assertEqual(Post.objects.count(), 5)
+        with open(id_map, encoding='utf-8') as source:
+            for source_id, pk in json.load(source).items():
+                self.assertEqual(
+                    Post.objects.get(pk=pk).text, f'Пост {int(source_id) - 10}'
+                )
+        self.assertEqual(
+            set(Post.objects.values_list('pub_date__year', flat=True)),
+            {2020},
+        )
+        self.assertFalse(Post.objects.filter(import_key__isnull=False))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 5)
+        self.assertEqual(self.author.stats.posts_count, 5)
+        self.assertIn('прочитано 6 строк, вставлено 5', out.getvalue())
+        self.assertIn('строк/с', out.getvalue())
+
+    def test_comments_and_follows_csv(self):
+        """CSV и gzip читаются, битые ссылки и дубли отбрасываются."""
+        existing = Post.objects.create(author=self.author, text='Старый пост')
+        id_map = os.path.join(self.directory, 'ids.json')
+        path = self.write(
+            'posts.csv',
+            'id,author,text\n'
+            f'{existing.pk},auth,Пост\n',
+        )
+        call_command(
+            'import_yatube', 'posts', path, id_map=id_map, stdout=StringIO()
+        )
+        post = Post.objects.get(text='Пост')
+        self.assertNotEqual(post.pk, existing.pk)
+        path = self.write(
+            'comments.csv.gz',
+            'post_id,author,text\n'
+            f'{existing.pk},noname,Комментарий\n'
+            f'{existing.pk + 100},noname,К чужому посту\n',
+            compress=True,
+        )
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', 'comments', path, stdout=StringIO())
+        call_command(
+            'import_yatube', 'comments', path, id_map=id_map,
+            stdout=StringIO()
+        )
+        post.refresh_from_db()
+        existing.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(existing.comments_count, 0)
+        Follow.objects.create(user=self.user, author=self.author)
+        path = self.write(
+            'follows.csv',
+            'user,author\nnoname,auth\nauth,noname\nauth,noname\nauth,auth\n',
+        )
+        call_command('import_yatube', 'follows', path, stdout=StringIO())
+        self.assertEqual(
+            set(Follow.objects.values_list('user__username',
+                                           'author__username')),
+            {('noname', 'auth'), ('auth', 'noname')},
+        )
+        out = StringIO()
+        call_command('import_yatube', 'follows', path, stdout=out)
+        self.assertIn('вставлено 0', out.getvalue())
+        path = self.write('broken.ndjson', '{"text": \n')
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', 'posts', path, stdout=StringIO())
+
+    def test_follow_conflicts_are_not_counted(self):
+        """Подписка, вставленная параллельно, не попадает в счёт."""
+        Follow.objects.create(user=self.user, author=self.author)
+        follows = [
+            Follow(user_id=self.user.pk, author_id=self.author.pk),
+            Follow(user_id=self.author.pk, author_id=self.user.pk),
+        ]
+        _, inserted = bulk_import._insert(Follow, follows, None)
+        self.assertEqual(inserted, 1)
+        self.assertEqual(Follow.objects.count(), 2)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class GcMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, name):
+        return SimpleUploadedFile(name, b'GIF89a same content', 'image/gif')
+
+    def test_shared_file_is_collected_after_last_reference(self):
+        """Одинаковые картинки делят файл, пока на него есть ссылки."""
+        posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {num}',
+                image=self.upload(f'copy{num}.gif'),
+            ) for num in range(2)
+        ]
+        name = posts[0].image.name
+        self.assertEqual(posts[1].image.name, name)
+        self.assertEqual(MediaFile.objects.get(name=name).ref_count, 2)
+        posts[0].delete()
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+        posts[1].image = ''
+        posts[1].save()
+        self.assertEqual(MediaFile.objects.get(name=name).ref_count, 0)
+        out = StringIO()
+        call_command('gc_media', grace=0, dry_run=True, stdout=out)
+        self.assertIn(name, out.getvalue())
+        self.assertTrue(default_storage.exists(name))
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_reupload_postpones_collection(self):
+        """Повторная загрузка файла без ссылок продлевает ему срок."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', image=self.upload('a.gif')
+        )
+        name = post.image.name
+        post.image = ''
+        post.save()
+        MediaFile.objects.filter(name=name).update(
+            updated=timezone.now() - timedelta(days=2)
+        )
+        self.assertEqual(
+            default_storage.save('posts/b.gif', self.upload('b.gif')), name
+        )
+        call_command('gc_media', grace=60 * 60, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+
+    def test_references_outside_signals_are_kept(self):
+        """Файл, на который ссылаются в обход сигналов, не удаляется."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', image=self.upload('a.gif')
+        )
+        name = post.image.name
+        MediaFile.objects.filter(name=name).update(ref_count=0)
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaFile.objects.get(name=name).ref_count, 1)
@@ -1,13 +1,16 @@
+import io
 import shutil
 import tempfile
 
 from http import HTTPStatus
+from PIL import Image
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 
+from posts.forms import PostForm
 from posts.models import Group, Post
 
 User = get_user_model()
@@ -209,3 +212,61 @@ class PostsFormTests(TestCase):
             f'{self.redirect_url_comment[0]}'
             f'?next={self.redirect_url_comment[1]}'
         )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIZE=1000, IMAGE_MAX_PIXELS=10 ** 7,
+    IMAGE_VARIANT_WIDTHS=(480, 960),
+)
+class ImagePipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @staticmethod
+    def upload(size, name='photo.jpg'):
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+    def test_upload_is_processed(self):
+        """Оригинал уменьшается без EXIF, варианты пишутся сразу."""
+        form = PostForm(
+            data={'text': 'Пост с картинкой'},
+            files={'image': self.upload((3000, 1500))},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.author
+        post.save()
+        with Image.open(post.image.path) as original:
+            self.assertEqual(original.size, (1000, 500))
+            self.assertFalse(original.getexif())
+        variants = Post.objects.get(pk=post.pk).variants
+        self.assertEqual(set(variants), {'webp', 'jpeg'})
+        for fmt, files in variants.items():
+            self.assertEqual([width for width, _ in files], [480, 960])
+            with post.image.storage.open(files[-1][1]) as variant:
+                with Image.open(variant) as image:
+                    self.assertEqual(image.format, fmt.upper())
+                    self.assertEqual(image.size, (960, 339))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response, post.image.storage.url(variants['webp'][-1][1])
+        )
+
+    def test_too_many_pixels(self):
+        """Слишком большая картинка не проходит валидацию."""
+        form = PostForm(
+            data={'text': 'Пост'}, files={'image': self.upload((4000, 3000))}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import instrumentation
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGETS_ENFORCED=True)
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        instrumentation.reset()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(InstrumentationTests.user)
+
+    def test_views_fit_query_budgets(self):
+        """Ленты и страница поста укладываются в бюджеты запросов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Ещё комментарий'},
+        )
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_budget_exceeded(self):
+        """Превышение бюджета роняет запрос в тестах."""
+        with self.assertRaises(instrumentation.QueryBudgetExceeded):
+            self.authorized_client.get(reverse('posts:index'))
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        """Метрики собираются по имени вью и отдаются в JSON."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        data = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        ).json()
+        index = data['posts:index']
+        self.assertEqual(index['queries']['count'], 2)
+        self.assertGreater(index['queries']['sum'], 0)
+        self.assertGreater(index['template_ms']['sum'], 0)
+        # Второй запрос берёт ленту из фрагментного кеша.
+        self.assertGreater(index['cache_hits']['sum'], 0)
+        self.assertGreater(index['cache_misses']['sum'], 0)
+        self.assertIn('object_cache', data)
+        self.assertIn('timeline_merges', data)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_is_internal(self):
+        """Метрики видят только персонал и сборщик с токеном."""
+        response = self.authorized_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 404)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.authorized_client.force_login(staff)
+        response = self.authorized_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.models import AuthorStats, Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -33,3 +33,95 @@ class PostModelTest(TestCase):
         for field, value in models_fields.items():
             with self.subTest(field=field):
                 self.assertEqual(str(field), value)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание',
+        )
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы следуют за постами."""
+        post = Post.objects.create(
+            author=CountersTest.author, text='Пост', group=CountersTest.group
+        )
+        self.assertEqual(AuthorStats.objects.get(
+            user=CountersTest.author
+        ).posts_count, 1)
+        self.assertEqual(Group.objects.get(
+            pk=CountersTest.group.pk
+        ).posts_count, 1)
+        post.group = CountersTest.group_2
+        post.save()
+        self.assertEqual(Group.objects.get(
+            pk=CountersTest.group.pk
+        ).posts_count, 0)
+        self.assertEqual(Group.objects.get(
+            pk=CountersTest.group_2.pk
+        ).posts_count, 1)
+        post.delete()
+        self.assertEqual(AuthorStats.objects.get(
+            user=CountersTest.author
+        ).posts_count, 0)
+        self.assertEqual(Group.objects.get(
+            pk=CountersTest.group_2.pk
+        ).posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        """Счётчики комментариев и подписок следуют за записями."""
+        post = Post.objects.create(author=CountersTest.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=CountersTest.user, text='Комментарий'
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 0)
+        follow = Follow.objects.create(
+            user=CountersTest.user, author=CountersTest.author
+        )
+        self.assertEqual(AuthorStats.objects.get(
+            user=CountersTest.author
+        ).followers_count, 1)
+        self.assertEqual(AuthorStats.objects.get(
+            user=CountersTest.user
+        ).following_count, 1)
+        follow.delete()
+        self.assertEqual(AuthorStats.objects.get(
+            user=CountersTest.author
+        ).followers_count, 0)
+
+    def test_save_keeps_counters(self):
+        """Сохранение устаревшего экземпляра не затирает счётчики."""
+        post = Post.objects.create(
+            author=CountersTest.author, text='Пост', group=CountersTest.group
+        )
+        group = Group.objects.get(pk=CountersTest.group.pk)
+        Comment.objects.create(
+            post=post, author=CountersTest.user, text='Комментарий'
+        )
+        Post.objects.create(
+            author=CountersTest.author, text='Пост 2',
+            group=CountersTest.group
+        )
+        post.text = 'Новый текст'
+        post.save()
+        group.title = 'Новое название'
+        group.save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Group.objects.get(
+            pk=CountersTest.group.pk
+        ).posts_count, 2)
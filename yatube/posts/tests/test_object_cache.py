@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from core import object_cache
+from core.object_cache import cached_get_object_or_404
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        object_cache.object_cache_metrics.clear()
+
+    def test_second_lookup_skips_database(self):
+        """Повторный поиск объекта и его связей не ходит в базу."""
+        with self.assertNumQueries(1):
+            post = cached_get_object_or_404(
+                Post, related=('author', 'group'), pk=self.post.pk
+            )
+        with self.assertNumQueries(0):
+            post = cached_get_object_or_404(
+                Post, related=('author', 'group'), pk=self.post.pk
+            )
+            self.assertEqual(post.author.username, 'auth')
+            self.assertEqual(post.group.title, 'Тестовая группа')
+        cached_get_object_or_404(Group, slug='test-slug')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cached_get_object_or_404(Group, slug='test-slug'), self.group
+            )
+        self.assertEqual(object_cache.stats()['posts.post'], {
+            'hits': 1, 'misses': 1, 'hit_rate': 0.5,
+        })
+
+    def test_save_and_delete_invalidate(self):
+        """Изменения объектов и связей видны сразу."""
+        cached_get_object_or_404(
+            Post, related=('author', 'group'), pk=self.post.pk
+        )
+        cached_get_object_or_404(Group, slug='test-slug')
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.slug = 'new-slug'
+        group.save()
+        post = cached_get_object_or_404(
+            Post, related=('author', 'group'), pk=self.post.pk
+        )
+        self.assertEqual(post.group.title, 'Новое название')
+        with self.assertRaises(Http404):
+            cached_get_object_or_404(Group, slug='test-slug')
+        Comment.objects.create(post=self.post, author=self.author, text='Да')
+        post = cached_get_object_or_404(Post, pk=self.post.pk)
+        self.assertEqual(post.comments_count, 1)
+        Post.objects.get(pk=self.post.pk).delete()
+        with self.assertRaises(Http404):
+            cached_get_object_or_404(Post, pk=self.post.pk)
+
+    @override_settings(OBJECT_CACHE_TIMEOUTS={})
+    def test_models_without_timeout_are_not_cached(self):
+        """Модели без таймаута всегда читаются из базы."""
+        Follow.objects.create(user=self.author, author=self.author)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                cached_get_object_or_404(Post, pk=self.post.pk)
+        self.assertEqual(object_cache.stats(), {})
+
+    def test_users_are_cached_without_private_fields(self):
+        """В кеш не попадают хеш пароля и почта пользователя."""
+        cached_get_object_or_404(User, username='auth')
+        cached_get_object_or_404(
+            Post, related=('author',), pk=self.post.pk
+        )
+        with self.assertNumQueries(0):
+            user = cached_get_object_or_404(User, username='auth')
+        self.assertEqual(
+            user.get_deferred_fields() & {'password', 'email'},
+            {'password', 'email'},
+        )
+        cached = cache.get(object_cache._object_key(User, self.author.pk))
+        self.assertNotIn('password', cached.__dict__)
+        self.assertEqual(user.password, self.author.password)
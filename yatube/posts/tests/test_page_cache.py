@@ -0,0 +1,116 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        """Повторный запрос анонима не ходит в базу и не рендерит шаблон."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertIsNone(second.context)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованным страницы всегда рендерятся заново."""
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.urls[0])
+        response = client.get(self.urls[0])
+        self.assertIsNotNone(response.context)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_conditional_get(self):
+        """По ETag и Last-Modified отдаётся 304, пока ленты не изменились."""
+        url = self.urls[3]
+        response = self.client.get(url)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_change_within_a_second_is_not_modified_since(self):
+        """Изменение в ту же секунду сдвигает Last-Modified."""
+        url = self.urls[3]
+        with mock.patch('core.feed_cache.time.time', return_value=1000.5):
+            modified = self.client.get(url)['Last-Modified']
+            Comment.objects.create(
+                post=self.post, author=self.author, text='Новый комментарий'
+            )
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_pages_with_placeholders_are_not_cached(self):
+        """Страница с заглушкой вместо миниатюры не кешируется."""
+        Post.objects.create(
+            author=self.author, text='Пост с картинкой',
+            image='posts/not-ready.jpg'
+        )
+        url = self.urls[0]
+        response = self.client.get(url)
+        self.assertContains(response, 'bg-light')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_profile_revalidates_after_follow(self):
+        """Подписка сбрасывает ETag и кеш профиля автора."""
+        url = self.urls[2]
+        etag = self.client.get(url)['ETag']
+        follower = User.objects.create_user(username='follower')
+        follow = Follow.objects.create(user=follower, author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Подписчиков: 1')
+        etag = response['ETag']
+        follow.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Подписчиков: 0')
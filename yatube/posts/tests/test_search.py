@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, SearchPosting
+from posts.search import search, tokenize
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кошки и ещё раз кошки'
+        )
+        cls.both = Post.objects.create(
+            author=cls.author, text='Кошки любят ёжиков'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки'
+        )
+
+    def test_tokenize(self):
+        """Слова приводятся к нижнему регистру, «ё» заменяется на «е»."""
+        self.assertEqual(
+            tokenize('Ёжик, ЁЖИК и ёлка!'),
+            {'ежик': 2, 'елка': 1},
+        )
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке текста и удалении поста."""
+        post = Post.objects.create(author=self.author, text='Старый текст')
+        post.text = 'Новый'
+        post.save()
+        self.assertEqual(
+            set(SearchPosting.objects.filter(
+                post=post
+            ).values_list('term', flat=True)),
+            {'новый'},
+        )
+        post.delete()
+        self.assertFalse(SearchPosting.objects.filter(post=post.pk).exists())
+
+    def test_ranking(self):
+        """Сначала посты со всеми словами запроса, затем по частоте."""
+        self.assertEqual(
+            list(search('кошки ежиков')), [self.both, self.cats]
+        )
+        self.assertEqual(list(search('кошки')), [self.cats, self.both])
+        self.assertFalse(search('!!!').exists())
+
+    def test_search_view(self):
+        """Страница поиска выводит найденные посты постранично."""
+        for num in range(settings.NUM_POSTS_PER_PAGE):
+            Post.objects.create(author=self.author, text=f'Собаки {num}')
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'собаки'})
+        self.assertEqual(response.context['query'], 'собаки')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.NUM_POSTS_PER_PAGE)
+        self.assertTrue(page_obj.has_next())
+        response = self.client.get(url, {'q': 'собаки', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 1)
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_search(self):
+        """Поиск в админке идёт через индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ежиков'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.both]
+        )
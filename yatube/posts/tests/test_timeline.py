@@ -0,0 +1,185 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+from posts.timeline import merge_metrics
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TimelineTests.user)
+
+    def timeline_posts(self):
+        return list(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.user
+            ).values_list('post_id', flat=True)
+        )
+
+    def test_follow_fills_and_unfollow_cleans_timeline(self):
+        """Подписка переносит посты автора в ленту, отписка убирает."""
+        follow = Follow.objects.create(
+            user=TimelineTests.user, author=TimelineTests.author
+        )
+        self.assertEqual(self.timeline_posts(), [TimelineTests.post.pk])
+        follow.delete()
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_new_post_is_pushed_to_followers(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(
+            user=TimelineTests.user, author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            author=TimelineTests.author, text='Новый пост'
+        )
+        self.assertIn(post.pk, self.timeline_posts())
+
+    def test_backfill_command_restores_timelines(self):
+        """Команда backfill_timelines восстанавливает ленты."""
+        Follow.objects.create(
+            user=TimelineTests.user, author=TimelineTests.author
+        )
+        TimelineEntry.objects.all().delete()
+        call_command('backfill_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [TimelineTests.post.pk])
+
+    def test_follow_index_reads_timeline_without_follow_join(self):
+        """Лента подписок не обращается к таблице Follow."""
+        Follow.objects.create(
+            user=TimelineTests.user, author=TimelineTests.author
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse('posts:follow_index')
+            )
+        self.assertEqual(
+            list(response.context['page_obj'].object_list),
+            [TimelineTests.post]
+        )
+        for query in queries.captured_queries:
+            self.assertNotIn('posts_follow', query['sql'])
+
+
+@override_settings(TIMELINE_CELEBRITY_THRESHOLD=2)
+class HybridTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.celebrity = User.objects.create_user(username='celebrity')
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='noname')
+        cls.fan = User.objects.create_user(username='fan')
+
+    def setUp(self) -> None:
+        cache.clear()
+        Follow.objects.create(
+            user=HybridTimelineTests.fan, author=HybridTimelineTests.celebrity
+        )
+        Follow.objects.create(
+            user=HybridTimelineTests.user,
+            author=HybridTimelineTests.celebrity
+        )
+        Follow.objects.create(
+            user=HybridTimelineTests.user, author=HybridTimelineTests.author
+        )
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(HybridTimelineTests.user)
+
+    def test_celebrity_posts_are_not_pushed(self):
+        """Посты популярного автора не раздаются по лентам."""
+        post = Post.objects.create(
+            author=HybridTimelineTests.celebrity, text='Пост звезды'
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post).exists()
+        )
+
+    def test_follow_index_merges_pulled_and_pushed_posts(self):
+        """Лента подписок сливает раздачу и посты популярных авторов."""
+        posts = [
+            Post.objects.create(
+                author=author, text=f'Пост {num}'
+            ) for num, author in enumerate((
+                HybridTimelineTests.author,
+                HybridTimelineTests.celebrity,
+                HybridTimelineTests.author,
+                HybridTimelineTests.celebrity,
+            ))
+        ]
+        merges = merge_metrics['merges']
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj'].object_list),
+            posts[::-1]
+        )
+        self.assertEqual(merge_metrics['merges'], merges + 1)
+
+    def test_merged_pages_by_cursor(self):
+        """Курсор гибридной ленты проходит все посты без дублей."""
+        for num in range(settings.NUM_POSTS_PER_PAGE):
+            for author in (
+                HybridTimelineTests.author, HybridTimelineTests.celebrity
+            ):
+                Post.objects.create(author=author, text=f'Пост {num}')
+        url = reverse('posts:follow_index')
+        first = self.authorized_client.get(url).context['page_obj']
+        second = self.authorized_client.get(
+            url, {'cursor': first.paginator.next_cursor}
+        ).context['page_obj']
+        seen = list(first.object_list) + list(second.object_list)
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(
+            seen, list(Post.objects.order_by('-pub_date', '-pk'))
+        )
+
+    def test_unfollow_below_threshold_fills_timelines(self):
+        """Автор, опустившийся ниже порога, раздаётся по лентам."""
+        post = Post.objects.create(
+            author=HybridTimelineTests.celebrity, text='Пост звезды'
+        )
+        cache.clear()
+        Follow.objects.filter(
+            user=HybridTimelineTests.fan
+        ).get().delete()
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=HybridTimelineTests.user, post=post
+            ).exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'].object_list)
+
+    def test_posts_pushed_before_promotion_are_not_duplicated(self):
+        """Разданные до роста популярности посты не дублируются."""
+        newcomer = User.objects.create_user(username='newcomer')
+        Follow.objects.create(user=HybridTimelineTests.user, author=newcomer)
+        post = Post.objects.create(author=newcomer, text='Пост новичка')
+        Follow.objects.create(user=HybridTimelineTests.fan, author=newcomer)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj'].object_list), [post]
+        )
@@ -4,13 +4,17 @@ import tempfile
 from http import HTTPStatus
 from django import forms
 from django.core.cache import cache
-from django.core.cache.utils import make_template_fragment_key
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.conf import settings
+from django.utils import timezone
 
+from core.feed_cache import get_feed_generation
+from core.thumbnails import render_thumbnails
 from posts.models import Comment, Group, Post, Follow
 
 User = get_user_model()
@@ -182,19 +186,21 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post.text, PostsPagesTests.post.text)
 
     def test_cache_index_page(self):
-        """Кеш сохраняется при удаление поста
-        и удаляется после принудительной чистки кеша.
+        """Кеш ленты живёт до изменения постов
+        и сбрасывается сигналом при удалении поста.
         """
-        post = Post.objects.get(id=PostsPagesTests.post.id)
-        post.delete()
+        cache.clear()
+        self.authorized_client.get(reverse(self.index_page[1]))
+        Post.objects.filter(id=PostsPagesTests.post.id).update(
+            text='Текст в обход сигналов'
+        )
         response = self.authorized_client.get(
             reverse(self.index_page[1])
         )
         self.assertIn(
             PostsPagesTests.post.text, response.content.decode('utf-8')
         )
-        key = make_template_fragment_key('index_page')
-        cache.delete(key)
+        Post.objects.get(id=PostsPagesTests.post.id).delete()
         response = self.authorized_client.get(
             reverse(self.index_page[1])
         )
@@ -202,6 +208,47 @@ class PostsPagesTests(TestCase):
             PostsPagesTests.post.text, response.content.decode('utf-8')
         )
 
+    def test_cache_index_page_per_cursor(self):
+        """Каждая страница ленты кешируется под своим ключом."""
+        cache.clear()
+        Post.objects.bulk_create([
+            Post(author=PostsPagesTests.author, text=f'Пост {num}')
+            for num in range(settings.NUM_POSTS_PER_PAGE)
+        ])
+        first = self.guest_client.get(reverse(self.index_page[1]))
+        second = self.guest_client.get(
+            reverse(self.index_page[1]),
+            {'cursor': first.context['page_obj'].paginator.next_cursor}
+        )
+        self.assertIn(
+            PostsPagesTests.post.text, second.content.decode('utf-8')
+        )
+        self.assertNotIn(
+            PostsPagesTests.post.text, first.content.decode('utf-8')
+        )
+
+    def test_cache_index_page_hit_without_queries(self):
+        """Повторный запрос ленты гостем не обращается к базе."""
+        cache.clear()
+        self.guest_client.get(reverse(self.index_page[1]))
+        with self.assertNumQueries(0):
+            self.guest_client.get(reverse(self.index_page[1]))
+
+    def test_cache_index_page_author_rename(self):
+        """Переименование автора сбрасывает кеш лент, а вход — нет."""
+        cache.clear()
+        author = User.objects.get(pk=PostsPagesTests.author.pk)
+        self.authorized_client.get(reverse(self.index_page[1]))
+        generation = get_feed_generation()
+        author.last_login = timezone.now()
+        author.save(update_fields=['last_login'])
+        self.assertEqual(get_feed_generation(), generation)
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        response = self.authorized_client.get(reverse(self.index_page[1]))
+        self.assertContains(response, 'Новое Имя')
+
     def test_group_page_show_correct_context(self):
         """Шаблон group_list сформирован с правильным контекстом."""
         response = self.authorized_client.get(
@@ -448,11 +495,166 @@ class PaginatorViewsTest(TestCase):
                         count
                     )
 
+    def test_pages_paginate_by_cursor(self):
+        """Переход по курсорам вперёд и назад без пропусков и дублей."""
+        for name, args in self.urls_pages:
+            with self.subTest(name=name):
+                url = reverse(name, args=args)
+                first = self.authorized_client.get(url).context['page_obj']
+                self.assertFalse(first.has_previous())
+                second = self.authorized_client.get(
+                    url, {'cursor': first.paginator.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second.object_list), self.next_page_posts
+                )
+                self.assertFalse(second.has_next())
+                self.assertFalse(
+                    set(first.object_list) & set(second.object_list)
+                )
+                back = self.authorized_client.get(
+                    url, {'cursor': second.paginator.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    list(back.object_list), list(first.object_list)
+                )
+
+    def test_broken_cursor_shows_first_page(self):
+        """Повреждённый курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse(self.index_page[0]), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(
+            len(response.context.get('page_obj').object_list),
+            self.first_page_posts
+        )
+
+    def test_deep_page_query_count(self):
+        """Страница по курсору не выполняет COUNT и OFFSET."""
+        url = reverse(self.index_page[0])
+        first = self.guest_client.get(url).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url, {'cursor': first.paginator.next_cursor})
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(*)', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='auth', first_name='Имя', last_name='Фамилия'
+        )
+        cls.user = User.objects.create_user(username='noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedQueriesTest.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(FeedQueriesTest.group.slug,)),
+            reverse('posts:profile', args=(FeedQueriesTest.author,)),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', args=(FeedQueriesTest.post.pk,)),
+        )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не растёт с числом постов
+        и комментариев на странице.
+        """
+        before = {url: self.count_queries(url) for url in self.urls}
+        authors = [
+            User.objects.create_user(username=f'author_{num}')
+            for num in range(settings.NUM_POSTS_PER_PAGE)
+        ]
+        for author in authors:
+            Follow.objects.create(user=FeedQueriesTest.user, author=author)
+            post = Post.objects.create(
+                author=author, text='Ещё пост', group=FeedQueriesTest.group
+            )
+            Comment.objects.create(post=post, author=author, text='Ответ')
+            Comment.objects.create(
+                post=FeedQueriesTest.post, author=author, text='Ответ'
+            )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), before[url])
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.extra = 5
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Ответ {num}')
+            for num in range(settings.NUM_COMMENTS_PER_PAGE + cls.extra)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.json_url = reverse('posts:post_comments', args=(self.post.pk,))
+
+    def test_post_detail_shows_one_page_of_comments(self):
+        """Страница поста выводит одну страницу комментариев."""
+        comments = self.client.get(self.url).context['comments']
+        self.assertEqual(len(comments), settings.NUM_COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+        response = self.client.get(
+            self.url, {'cursor': comments.paginator.next_cursor}
+        )
+        self.assertEqual(len(response.context['comments']), self.extra)
+
+    def test_comments_json(self):
+        """JSON-эндпоинт отдаёт комментарии и ссылку на следующую порцию."""
+        data = self.client.get(self.json_url).json()
+        self.assertEqual(
+            len(data['results']), settings.NUM_COMMENTS_PER_PAGE
+        )
+        self.assertEqual(
+            set(data['results'][0]), {'id', 'author', 'text', 'created'}
+        )
+        rest = self.client.get(data['next']).json()
+        self.assertEqual(len(rest['results']), self.extra)
+        self.assertIsNone(rest['next'])
+        ids = [item['id'] for item in data['results'] + rest['results']]
+        self.assertEqual(
+            ids,
+            list(self.post.comments.order_by(
+                '-created', '-pk'
+            ).values_list('pk', flat=True)),
+        )
+
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostImageTests(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -538,3 +740,15 @@ class PostImageTests(TestCase):
                     self.assertEqual(
                         context_page.image, PostImageTests.post.image
                     )
+
+    def test_feed_shows_placeholder_until_thumbnail_is_ready(self):
+        """Лента не генерирует миниатюру сама, а показывает заглушку
+        до готовности фоновой задачи.
+        """
+        url = reverse(self.index_page[0])
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'bg-light')
+        self.assertNotContains(response, 'class="card-img h-auto my-2"')
+        render_thumbnails(PostImageTests.post.image.name)
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'class="card-img h-auto my-2"')
@@ -0,0 +1,199 @@
+import logging
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F
+
+from core import instrumentation
+from core.paginator_custome import (
+    CursorPaginator, MergedCursorPaginator, page_from_request
+)
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+# Накопленная стоимость слияний в гибридном режиме для этого процесса.
+merge_metrics = Counter()
+instrumentation.register_section(
+    'timeline_merges', lambda: dict(merge_metrics)
+)
+
+
+def is_celebrity(author_id):
+    """Посты автора подмешиваются при чтении, а не раздаются.
+
+    Решение принимается по счётчику в базе, а не по кешу, чтобы все
+    процессы одинаково видели переход автора через порог.
+    """
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    return threshold is not None and AuthorStats.objects.filter(
+        user_id=author_id, followers_count__gte=threshold
+    ).exists()
+
+
+def pulled_authors(user):
+    """Популярные авторы из подписок пользователя.
+
+    Популярных авторов мало, их список читается по индексу счётчика;
+    пока их нет, таблица Follow не читается вовсе.
+    """
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    if threshold is None:
+        return []
+    celebrities = list(AuthorStats.objects.filter(
+        followers_count__gte=threshold
+    ).values_list('user_id', flat=True))
+    if not celebrities:
+        return []
+    return list(Follow.objects.filter(
+        user=user, author_id__in=celebrities
+    ).values_list('author_id', flat=True))
+
+
+def _bulk_insert(entries):
+    """Пишет записи лент пачками, пропуская уже существующие."""
+    batch_size = settings.TIMELINE_BATCH_SIZE
+    entries = iter(entries)
+    total = 0
+    batch = list(islice(entries, batch_size))
+    while batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+        batch = list(islice(entries, batch_size))
+    return total
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id, user__isnull=False
+    ).values_list('user_id', flat=True)
+    return _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ) for user_id in followers.iterator()
+    )
+
+
+def add_author(user_id, author_id):
+    """Переносит посты автора в ленту нового подписчика."""
+    if is_celebrity(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by().values_list(
+        'pk', 'pub_date'
+    )
+    return _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        ) for post_id, pub_date in posts.iterator()
+    )
+
+
+def fill_author(author_id):
+    """Раздаёт все посты автора всем его подписчикам.
+
+    Нужна, когда автор опускается ниже порога популярности: пока он был
+    выше, его посты не раздавались и в лентах подписчиков их нет.
+    Уже существующие записи пропускаются, повторный вызов безопасен.
+    """
+    followers = Follow.objects.filter(
+        author_id=author_id, user__isnull=False
+    ).values_list('user_id', flat=True)
+    posts = list(Post.objects.filter(
+        author_id=author_id
+    ).order_by().values_list('pk', 'pub_date'))
+    return _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id in followers.iterator()
+        for post_id, pub_date in posts
+    )
+
+
+def demote_if_needed(author_id):
+    """Переводит автора на раздачу, если он только что стал ниже порога.
+
+    Вызывается после уменьшения счётчика подписчиков. Переход через
+    порог — отписка, после которой подписчиков стало ровно на одного
+    меньше порога. Если переход пропущен (например, счётчики
+    пересчитаны командой), ленты чинит `backfill_timelines`.
+    """
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    if threshold is None or not AuthorStats.objects.filter(
+        user_id=author_id, followers_count=threshold - 1
+    ).exists():
+        return 0
+    return fill_author(author_id)
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def _record_merge(stats):
+    merge_metrics['merges'] += 1
+    merge_metrics['sources'] += stats['sources']
+    merge_metrics['rows_fetched'] += stats['rows_fetched']
+    merge_metrics['rows_returned'] += stats['rows_returned']
+    merge_metrics['microseconds'] += int(stats['seconds'] * 1_000_000)
+    logger.debug('Слияние ленты подписок: %s', stats)
+
+
+def timeline_page(request, user, per_page, posts=None):
+    """Страница ленты подписок.
+
+    Курсор идёт по позициям (pub_date, post_id). Раздаваемые посты
+    читаются из материализованной ленты, посты популярных авторов
+    берутся из их собственных лент и сливаются при чтении. Сами посты
+    подгружаются отдельным запросом по первичному ключу из `posts`
+    (по умолчанию `for_feed()`; строки `.values()` должны содержать pk).
+    """
+    entries = TimelineEntry.objects.filter(user=user).only(
+        'post', 'pub_date'
+    )
+    pulled = pulled_authors(user)
+    if pulled:
+        # Посты, разданные до того, как автор стал популярным,
+        # уже придут из его собственной ленты.
+        entries = entries.exclude(author_id__in=pulled)
+        sources = [entries] + [
+            Post.objects.filter(author_id=author_id).annotate(
+                post_id=F('pk')
+            ).only('pub_date')
+            for author_id in pulled
+        ]
+        paginator = MergedCursorPaginator(
+            sources, per_page, tie_breaker='post_id'
+        )
+    else:
+        paginator = CursorPaginator(entries, per_page, tie_breaker='post_id')
+    page_obj = page_from_request(request, paginator)
+    if pulled:
+        _record_merge(paginator.merge_stats)
+    post_ids = [entry.post_id for entry in page_obj.object_list]
+    if posts is None:
+        posts = Post.objects.for_feed()
+    found = {
+        row['pk'] if isinstance(row, dict) else row.pk: row
+        for row in posts.filter(pk__in=post_ids).order_by()
+    }
+    page_obj.object_list = [
+        found[post_id] for post_id in post_ids if post_id in found
+    ]
+    return page_obj
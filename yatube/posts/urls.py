@@ -36,6 +36,11 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -46,6 +51,11 @@ urlpatterns = [
         views.post_create,
         name='post_create'
     ),
+    path(
+        'search/',
+        views.search_posts,
+        name='search'
+    ),
     path(
         'follow/',
         views.follow_index,
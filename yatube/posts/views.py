@@ -1,48 +1,63 @@
+from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.utils.functional import SimpleLazyObject
 
 from .models import Follow, Group, Post, User
+from .counters import stats_for
 from .forms import PostForm, CommentForm
+from .search import search
+from .timeline import timeline_page
+from core.feed_cache import get_feed_generation
+from core.object_cache import cached_get_object_or_404
 from core.paginator_custome import paginator_for_posts
-from yatube.settings import NUM_POSTS_PER_PAGE
+from yatube.settings import (
+    FEED_CACHE_TIMEOUT, NUM_COMMENTS_PER_PAGE, NUM_POSTS_PER_PAGE
+)
 
 
 def index(request):
-    """Вывод последних 10 публикаций на главную страницу."""
-    post_list = Post.objects.all().select_related('group')
-    page_obj = paginator_for_posts(
-        request,
-        post_list,
-        NUM_POSTS_PER_PAGE
+    """Вывод последних 10 публикаций на главную страницу.
+
+    Страница вычисляется лениво: при попадании во фрагментный кеш
+    шаблона лента отдаётся без запросов к базе.
+    """
+    post_list = Post.objects.for_feed()
+    page_obj = SimpleLazyObject(
+        lambda: paginator_for_posts(request, post_list, NUM_POSTS_PER_PAGE)
     )
     template = 'posts/index.html'
     context = {
         'page_obj': page_obj,
+        'feed_generation': get_feed_generation(),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
 def group_posts(request, slug):
     """Вывод последних 10 публикаций сообщества."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginator_for_posts(
-        request,
-        post_list,
-        NUM_POSTS_PER_PAGE
+    group = cached_get_object_or_404(Group, slug=slug)
+    post_list = group.posts.for_feed()
+    page_obj = SimpleLazyObject(
+        lambda: paginator_for_posts(request, post_list, NUM_POSTS_PER_PAGE)
     )
     template = 'posts/group_list.html'
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_generation': get_feed_generation(),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
 def profile(request, username):
     """Страница профиля автора."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = cached_get_object_or_404(User, username=username)
+    post_list = author.posts.for_feed()
     page_obj = paginator_for_posts(
         request,
         post_list,
@@ -52,6 +67,7 @@ def profile(request, username):
     context = {
         'page_obj': page_obj,
         'author': author,
+        'stats': stats_for(author),
     }
     if request.user.is_authenticated and request.user != username:
         following = author.following.filter(user=request.user)
@@ -59,12 +75,24 @@ def profile(request, username):
     return render(request, template, context)
 
 
+def comments_page(request, post):
+    """Страница комментариев поста от новых к старым."""
+    comments = post.comments.select_related('author').only(
+        'text', 'created', 'post', 'author', 'author__username'
+    )
+    return paginator_for_posts(
+        request, comments, NUM_COMMENTS_PER_PAGE, ordering_field='created'
+    )
+
+
 def post_detail(request, post_id):
     """Страница деталей поста."""
-    post_user = get_object_or_404(Post, id=post_id)
-    total_posts = post_user.author.posts.count()
+    post_user = cached_get_object_or_404(
+        Post, related=('author', 'group'), pk=post_id
+    )
+    total_posts = stats_for(post_user.author).posts_count
     form = CommentForm()
-    comments = post_user.comments.all()
+    comments = comments_page(request, post_user)
     template = 'posts/post_detail.html'
     context = {
         'post_user': post_user,
@@ -75,6 +103,29 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+def post_comments(request, post_id):
+    """Следующие страницы комментариев в JSON для подгрузки."""
+    post = cached_get_object_or_404(Post, pk=post_id)
+    page = comments_page(request, post)
+    next_url = None
+    if page.paginator.next_cursor:
+        next_url = '{}?cursor={}'.format(
+            reverse('posts:post_comments', args=(post.pk,)),
+            page.paginator.next_cursor,
+        )
+    return JsonResponse({
+        'results': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created,
+            } for comment in page
+        ],
+        'next': next_url,
+    })
+
+
 @login_required
 def post_create(request):
     """Страница для создания поста."""
@@ -94,8 +145,8 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     """Страница для редактирования поста."""
-    post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    post = cached_get_object_or_404(Post, pk=post_id)
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post.pk)
     form = PostForm(
         request.POST or None,
@@ -115,7 +166,7 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     """Добавление комментария к посту."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = cached_get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -125,18 +176,25 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id)
 
 
+def search_posts(request):
+    """Поиск постов по словам текста."""
+    query = request.GET.get('q', '').strip()
+    post_list = search(query, Post.objects.for_feed())
+    paginator = Paginator(post_list, NUM_POSTS_PER_PAGE)
+    template = 'posts/search.html'
+    context = {
+        'query': query,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, template, context)
+
+
 @login_required
 def follow_index(request):
     """Страница авторов,
     на которых подписан пользователь.
     """
-    post_list = Post.objects.filter(
-        author__following__user=request.user).select_related('group')
-    page_obj = paginator_for_posts(
-        request,
-        post_list,
-        NUM_POSTS_PER_PAGE
-    )
+    page_obj = timeline_page(request, request.user, NUM_POSTS_PER_PAGE)
     context = {
         'page_obj': page_obj,
     }
@@ -147,7 +205,7 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     """Подписка на автора."""
-    following = get_object_or_404(User, username=username)
+    following = cached_get_object_or_404(User, username=username)
     if following != request.user:
         Follow.objects.get_or_create(user=request.user, author=following)
         return redirect('posts:follow_index')
@@ -157,7 +215,7 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     """Отписаться от автора."""
-    following = get_object_or_404(User, username=username)
+    following = cached_get_object_or_404(User, username=username)
     subscription = get_object_or_404(
         Follow, user=request.user, author=following
     )
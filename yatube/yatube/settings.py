@@ -39,11 +39,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -124,6 +126,25 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки хранятся по хешу содержимого, одинаковые файлы не дублируются.
+# Миниатюры sorl сами выбирают себе имена и лежат в обычном хранилище.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# Файлы без ссылок удаляет gc_media не раньше, чем через это время.
+MEDIA_GC_GRACE = 60 * 60 * 24
+
+# Файлы с хешем в имени не меняются и кешируются клиентами навсегда,
+# остальные медиафайлы — на MEDIA_MAX_AGE секунд.
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_MAX_AGE = 60 * 60
+
+# Кто отправляет медиафайлы: None — само приложение через FileResponse,
+# 'x-sendfile' — Apache/lighttpd, 'x-accel-redirect' — nginx. Для nginx
+# MEDIA_ROOT должен быть доступен по internal location с этим префиксом.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [
@@ -142,14 +163,139 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUM_POSTS_PER_PAGE = 10
 
+NUM_COMMENTS_PER_PAGE = 20
+
+# Сколько строк выгрузка export_yatube читает из базы за раз.
+EXPORT_CHUNK_SIZE = 2000
+
+# Размер пачки при записи материализованных лент подписок.
+TIMELINE_BATCH_SIZE = 1000
+
+# Посты авторов, у которых подписчиков не меньше порога, не раздаются
+# по лентам, а подмешиваются при чтении. None отключает гибридный режим.
+TIMELINE_CELEBRITY_THRESHOLD = 10000
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
+# Варианты кеша. locmem — отдельный кеш в памяти каждого процесса,
+# sqlite — общий файл для всех воркеров машины с LRU-вытеснением.
+# Инвалидация сменой поколения, кеш страниц и объектов и блокировки
+# пересчёта требуют общего кеша, поэтому по умолчанию выбран sqlite;
+# locmem годится только для одного процесса (см. проверку core.W001).
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+CACHE_STORAGE = 'sqlite'
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_STORAGE],
+}
+
+# Фрагменты лент инвалидируются сменой поколения при записи, и в общем
+# кеше таймаут лишь ограничивает время жизни устаревших ключей. В locmem
+# смена поколения не доходит до других процессов, поэтому там фрагменты
+# живут, как до версионирования, 20 секунд.
+FEED_CACHE_TIMEOUT = 20 if CACHE_STORAGE == 'locmem' else 60 * 60 * 24
+
+# Защита фрагментов от лавины пересчётов: сколько устаревшая версия
+# живёт после срока, сколько держится блокировка пересчёта и насколько
+# рано (в долях времени расчёта) начинать вероятностный пересчёт.
+CACHE_STALE_TIMEOUT = 60 * 5
+
+CACHE_LOCK_TIMEOUT = 10
+
+CACHE_EARLY_RECOMPUTE_BETA = 1.0
+
+# Страницы, которые анонимам отдаются целиком из кеша. Изменения
+# постов, групп, комментариев и имён авторов сбрасывают их сразу.
+# Таймаут освобождает место в кеше, но выданные ETag он не отзывает.
+PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+)
+
+# Страницы, зависящие ещё от своих данных: вью и аргумент URL,
+# по которому сбрасывается область (профиль — при подписках).
+PAGE_CACHE_SCOPES = {
+    'posts:profile': 'username',
+}
+
+PAGE_CACHE_TIMEOUT = 60
+
+# Время жизни объектов в read-through кеше по меткам моделей.
+# Модели, которых здесь нет, не кешируются.
+OBJECT_CACHE_TIMEOUTS = {
+    'posts.post': 60 * 5,
+    'posts.group': 60 * 60,
+    'auth.user': 60 * 10,
 }
 
+# Поля, которые объектный кеш хранит для модели; остальные читаются
+# из базы при обращении. Модели, которых здесь нет, хранятся целиком.
+OBJECT_CACHE_FIELDS = {
+    'auth.user': ('username', 'first_name', 'last_name'),
+}
+
+# Загруженные картинки уменьшаются до IMAGE_MAX_SIZE по длинной
+# стороне, а для карточек лент сразу готовятся варианты WebP и JPEG
+# пропорций IMAGE_VARIANT_SIZE под каждую ширину.
+IMAGE_MAX_SIZE = 2048
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_VARIANT_SIZE = (960, 339)
+IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+IMAGE_QUALITY = {'jpeg': 85, 'webp': 80}
+
+# Атрибут sizes картинок по раскладке страницы: ширина содержимого
+# .container из Bootstrap 5 (поля по 12px) на каждой точке перелома.
+IMAGE_SIZES = {
+    # Карточки лент во всю ширину контейнера.
+    'feed': '(min-width: 1400px) 1296px, (min-width: 1200px) 1116px, (min-width: 992px) 936px, (min-width: 768px) 696px, (min-width: 576px) 516px, calc(100vw - 24px)',
+    # Колонка col-md-9 страницы поста.
+    'detail': '(min-width: 1400px) 966px, (min-width: 1200px) 831px, (min-width: 992px) 696px, (min-width: 576px) 516px, calc(100vw - 24px)',
+}
+
+# Миниатюры sorl для картинок без готовых вариантов готовятся в фоне
+# при сохранении, тех же ширин и пропорций, что и варианты.
+# 0 — готовить их синхронно, в текущем потоке сразу после коммита.
+# Под тестами фоновые потоки не должны писать во временный MEDIA_ROOT
+# после конца теста, такие тесты ставят 0 через override_settings.
+THUMBNAIL_WORKERS = 2
+
+# Предельное число SQL-запросов на запрос к вью. Превышение пишется
+# в лог, а при QUERY_BUDGETS_ENFORCED (в тестах) роняет запрос.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 6,
+    'posts:post_comments': 4,
+    'posts:follow_index': 6,
+    'posts:add_comment': 6,
+    'api:posts': 3,
+    'api:group_posts': 4,
+    'api:profile_posts': 4,
+    'api:follow': 6,
+}
+
+QUERY_BUDGETS_ENFORCED = False
+
+# Токен сборщика метрик для /internal/metrics/ (заголовок
+# Authorization: Bearer <токен>). None — метрики видит только персонал.
+METRICS_TOKEN = None
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
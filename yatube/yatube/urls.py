@@ -2,14 +2,22 @@ from django.contrib import admin
 from django.urls import path, include
 
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import media, metrics
+from posts.export import export
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/export/<str:name>/', export, name='export'),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('posts.api_urls', namespace='api')),
+    path('internal/metrics/', metrics, name='metrics'),
+    path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>', media, name='media'
+    ),
 ]
 
 handler404 = 'core.views.page_not_found'
@@ -21,6 +29,3 @@ if settings.DEBUG:
     urlpatterns = [
         path('__debug__/', include(debug_toolbar.urls)),
     ] + urlpatterns
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )